@@ -0,0 +1,300 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Measure the Client methods against a local fake Faythe API.
+
+Every method is called --number times in each mode:
+
+- single: one thread calling the method in a loop.
+- threaded: --threads threads sharing one client.
+- batch: the batch methods, every call handles --batch-size items.
+- async: an AsyncClient with --threads concurrent calls, if aiohttp
+  is installed.
+
+Usage: python benchmarks/bench_client.py [--mode MODE] [--items N]
+       [--latency SECONDS] [--padding N] [--json]
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import platform
+import sys
+import time
+
+import faytheclient
+from faytheclient import client
+
+from fake_faythe import FakeFaythe, HEALER, SILENCE
+from bench_codec import CLOUD, SCALER
+
+CLOUD_ID = '%032x' % 0
+MODES = ('single', 'threaded', 'batch', 'async')
+
+
+def operations(padding):
+    """Return the (name, callable) pairs measured in the single,
+    threaded and async modes, the callables take the client.
+    """
+    metadata = {'padding': 'x' * padding} if padding else {}
+    cloud = dict(CLOUD, metadata=metadata)
+    scaler = dict(SCALER, metadata=metadata)
+    healer = dict(HEALER, metadata=metadata)
+    silence = dict(SILENCE, metadata=metadata)
+    policies = [['user0', '/clouds', 'GET']]
+    return (
+        ('list_clouds', lambda c: c.list_clouds()),
+        ('register_cloud', lambda c: c.register_cloud('openstack', cloud)),
+        ('update_cloud', lambda c: c.update_cloud(CLOUD_ID, cloud)),
+        ('unregister_cloud', lambda c: c.unregister_cloud(CLOUD_ID)),
+        ('list_scalers', lambda c: c.list_scalers(CLOUD_ID)),
+        ('create_scaler', lambda c: c.create_scaler(CLOUD_ID, scaler)),
+        ('update_scaler', lambda c: c.update_scaler(CLOUD_ID, scaler)),
+        ('delete_scaler', lambda c: c.delete_scaler(CLOUD_ID)),
+        ('list_nresolvers', lambda c: c.list_nresolvers()),
+        ('list_healers', lambda c: c.list_healers(CLOUD_ID)),
+        ('create_healer', lambda c: c.create_healer(CLOUD_ID, healer)),
+        ('delete_healers', lambda c: c.delete_healers(CLOUD_ID)),
+        ('list_silences', lambda c: c.list_silences(CLOUD_ID)),
+        ('create_silence', lambda c: c.create_silence(CLOUD_ID, silence)),
+        ('delete_silence', lambda c: c.delete_silence(CLOUD_ID)),
+        ('list_users', lambda c: c.list_users()),
+        ('create_user', lambda c: c.create_user(
+            {'username': 'user0', 'password': 'secret'})),
+        ('delete_user', lambda c: c.delete_user('user0')),
+        ('change_password', lambda c: c.change_password('user0', 'new')),
+        ('add_policies', lambda c: c.add_policies('user0', policies)),
+        ('remove_policies', lambda c: c.remove_policies('user0', policies)),
+    )
+
+
+def streaming_operations():
+    # Only the synchronous client streams the listings.
+    return (
+        ('iter_clouds', lambda c: sum(1 for _ in c.iter_clouds())),
+        ('iter_scalers', lambda c: sum(1 for _ in c.iter_scalers(CLOUD_ID))),
+        ('iter_silences',
+         lambda c: sum(1 for _ in c.iter_silences(CLOUD_ID))),
+    )
+
+
+def batch_operations(padding, size):
+    metadata = {'padding': 'x' * padding} if padding else {}
+    clouds = [('openstack', dict(CLOUD, metadata=metadata))] * size
+    scalers = [dict(SCALER, metadata=metadata)] * size
+    healers = [dict(HEALER, metadata=metadata)] * size
+    silences = [dict(SILENCE, metadata=metadata)] * size
+    ids = [CLOUD_ID] * size
+
+    def run(method, *args):
+        for result in method(*args):
+            result.get()
+
+    return (
+        ('register_clouds', lambda c: run(c.register_clouds, clouds)),
+        ('unregister_clouds', lambda c: run(c.unregister_clouds, ids)),
+        ('create_scalers',
+         lambda c: run(c.create_scalers, CLOUD_ID, scalers)),
+        ('delete_scalers', lambda c: run(c.delete_scalers, ids)),
+        ('create_healers',
+         lambda c: run(c.create_healers, CLOUD_ID, healers)),
+        ('create_silences',
+         lambda c: run(c.create_silences, CLOUD_ID, silences)),
+        ('delete_silences', lambda c: run(c.delete_silences, ids)),
+    )
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = int(round(percent / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def summarize(mode, name, latencies, wall, errors, items=1):
+    latencies = sorted(latencies)
+    calls = len(latencies)
+    return {
+        'mode': mode,
+        'operation': name,
+        'calls': calls,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1e3, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1e3, 3),
+        'mean_ms': round(sum(latencies) / calls * 1e3, 3) if calls else 0.0,
+        'ops_per_sec': round(calls * items / wall, 1) if wall else 0.0,
+    }
+
+
+def timed(func, cli):
+    started_at = time.perf_counter()
+    try:
+        func(cli)
+    except Exception:
+        return time.perf_counter() - started_at, 1
+    return time.perf_counter() - started_at, 0
+
+
+def bench_single(cli, ops, number, items=1, mode='single'):
+    results = []
+    for name, func in ops:
+        func(cli)  # warm up
+        latencies, errors = [], 0
+        started_at = time.perf_counter()
+        for _ in range(number):
+            latency, failed = timed(func, cli)
+            latencies.append(latency)
+            errors += failed
+        wall = time.perf_counter() - started_at
+        results.append(summarize(mode, name, latencies, wall, errors, items))
+    return results
+
+
+def bench_threaded(cli, ops, number, threads):
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        for name, func in ops:
+            func(cli)  # warm up
+            started_at = time.perf_counter()
+            outcomes = list(executor.map(lambda _: timed(func, cli),
+                                         range(number)))
+            wall = time.perf_counter() - started_at
+            results.append(summarize(
+                'threaded', name, [o[0] for o in outcomes], wall,
+                sum(o[1] for o in outcomes)))
+    return results
+
+
+def bench_async(endpoint, ops, number, concurrency, client_options):
+    from faytheclient.aio import client as aio_client
+
+    async def timed_call(semaphore, func, cli):
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                await func(cli)
+            except Exception:
+                return time.perf_counter() - started_at, 1
+            return time.perf_counter() - started_at, 0
+
+    async def run():
+        results = []
+        semaphore = asyncio.Semaphore(concurrency)
+        async with aio_client.AsyncClient(endpoint, 'admin', 'secret',
+                                          **client_options) as cli:
+            for name, func in ops:
+                await func(cli)  # warm up
+                started_at = time.perf_counter()
+                outcomes = await asyncio.gather(*[
+                    timed_call(semaphore, func, cli) for _ in range(number)])
+                wall = time.perf_counter() - started_at
+                results.append(summarize(
+                    'async', name, [o[0] for o in outcomes], wall,
+                    sum(o[1] for o in outcomes)))
+        return results
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mode', choices=MODES, action='append',
+                        help='mode to run, may be repeated, defaults to all')
+    parser.add_argument('--operation', action='append',
+                        help='operation to run, may be repeated, '
+                             'defaults to all')
+    parser.add_argument('--number', type=int, default=200,
+                        help='calls per operation and mode')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='concurrent calls in threaded and async modes')
+    parser.add_argument('--batch-size', type=int, default=20,
+                        help='items per call in batch mode')
+    parser.add_argument('--items', type=int, default=10,
+                        help='number of items in every listing')
+    parser.add_argument('--padding', type=int, default=0,
+                        help='bytes of padding added to every object')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds the server delays every response')
+    parser.add_argument('--codec', default='auto',
+                        help='JSON codec of the clients')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args()
+
+    modes = args.mode or MODES
+    wanted = set(args.operation or ())
+
+    def select(ops):
+        return [op for op in ops if not wanted or op[0] in wanted]
+
+    client_options = {'codec': args.codec, 'pool_maxsize': args.threads}
+    results = []
+    with FakeFaythe(items=args.items, latency=args.latency,
+                    padding=args.padding) as server:
+        cli = client.Client(server.endpoint, 'admin', 'secret',
+                            max_workers=args.threads, **client_options)
+        try:
+            ops = select(operations(args.padding) + streaming_operations())
+            if 'single' in modes:
+                results += bench_single(cli, ops, args.number)
+            if 'threaded' in modes:
+                results += bench_threaded(cli, ops, args.number,
+                                          args.threads)
+            if 'batch' in modes:
+                batch_ops = select(batch_operations(args.padding,
+                                                    args.batch_size))
+                number = max(1, args.number // args.batch_size)
+                results += bench_single(cli, batch_ops, number,
+                                        args.batch_size, mode='batch')
+        finally:
+            cli.close()
+        if 'async' in modes:
+            try:
+                import aiohttp  # noqa: F401
+            except ImportError:
+                print('async: aiohttp is not installed', file=sys.stderr)
+            else:
+                results += bench_async(server.endpoint,
+                                       select(operations(args.padding)),
+                                       args.number, args.threads,
+                                       client_options)
+
+    if args.json:
+        print(json.dumps({
+            'version': faytheclient.__version__,
+            'python': platform.python_version(),
+            'options': vars(args),
+            'results': results,
+        }, indent=2))
+        return
+    for r in results:
+        print('%-8s %-18s %8.3f ms p50 %8.3f ms p99 %10.1f ops/s%s' %
+              (r['mode'], r['operation'], r['p50_ms'], r['p99_ms'],
+               r['ops_per_sec'],
+               ' (%d errors)' % r['errors'] if r['errors'] else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Compare the JSON codecs on representative Faythe documents.
+
+Usage: python benchmarks/bench_codec.py [--scalers N] [--number N] [--json]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+
+from faytheclient import codec
+
+CLOUD = {
+    "id": "3b8c2d5d64c0e8a1e9f0a5c3d0b5e9a1",
+    "auth": {
+        "username": "admin",
+        "auth_url": "http://192.169.1.2:5000/v3",
+        "password": "fakepassword",
+        "project_name": "admin",
+        "domain_name": "Default",
+        "region_name": "RegionOne"
+    },
+    "monitor": {
+        "backend": "prometheus",
+        "address": "http://192.169.1.3:9091/",
+        "username": "admin",
+        "password": "fakepassword"
+    },
+    "atengine": {
+        "backend": "stackstorm",
+        "address": "http://192.169.1.4",
+        "apikey": "fakepassword"
+    },
+    "provider": "openstack",
+    "tags": ["test", "production"]
+}
+
+SCALER = {
+    "query": "asg:memory:avg{stack_asg_name=\"cloud-portal-autoscaling\"} > 75",
+    "duration": "5m",
+    "interval": "60s",
+    "actions": {
+        "scale_out": {
+            "url": "http://192.169.1.2:8000/v1/signal/fakeactionurl",
+            "attempts": 4,
+            "delay": "50ms",
+            "type": "http",
+            "delay_type": "backoff",
+            "method": "POST"
+        }
+    },
+    "cooldown": "10m",
+    "metadata": {"group": "cloud_portal"},
+    "active": True,
+    "tags": ["test"]
+}
+
+
+def documents(scalers):
+    listing = {}
+    for i in range(scalers):
+        scaler = dict(SCALER, id='%032x' % i)
+        listing[scaler['id']] = scaler
+    return {
+        'cloud': CLOUD,
+        'scaler': SCALER,
+        'scalers listing': {'status': 'success', 'data': listing},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scalers', type=int, default=1000,
+                        help='number of scalers in the listing document')
+    parser.add_argument('--number', type=int, default=0,
+                        help='iterations per measure, 0 to autorange')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args()
+
+    codecs = []
+    for name in codec.BACKENDS:
+        try:
+            codecs.append(codec.get_codec(name))
+        except ImportError:
+            print('%s: not installed' % name, file=sys.stderr)
+
+    results = []
+    for doc_name, doc in documents(args.scalers).items():
+        for c in codecs:
+            encoded = c.dumps(doc)
+            for op, func in (('dumps', lambda: c.dumps(doc)),
+                             ('loads', lambda: c.loads(encoded))):
+                timer = timeit.Timer(func)
+                number = args.number or timer.autorange()[0]
+                best = min(timer.repeat(repeat=5, number=number)) / number
+                results.append({'document': doc_name, 'codec': c.name,
+                                'operation': op, 'bytes': len(encoded),
+                                'usec': round(best * 1e6, 2)})
+                if not args.json:
+                    print('%-16s %-10s %-5s %10.2f us' %
+                          (doc_name, c.name, op, best * 1e6))
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
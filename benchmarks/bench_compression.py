@@ -0,0 +1,108 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Measure the transfer of large listings and bodies over a slow link,
+with and without compression.
+
+The fake Faythe API simulates the bandwidth of the link, it gzips its
+responses when the clients accept it and the client gzips the request
+bodies of at least 1 KiB when compression is on.
+
+Usage: python benchmarks/bench_compression.py [--items N]
+       [--bandwidth BYTES] [--number N] [--json]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from faytheclient import client
+
+from fake_faythe import FakeFaythe
+
+CLOUD_ID = '%032x' % 0
+
+
+def policies(count):
+    return [['user%d' % i, '/scalers/%032x/*' % i, 'GET'] for i in
+            range(count)]
+
+
+def measure(func, number):
+    samples = []
+    for _ in range(number):
+        started_at = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started_at)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=2000,
+                        help='number of items in every listing')
+    parser.add_argument('--bandwidth', type=float, default=10e6,
+                        help='bytes per second of the simulated link')
+    parser.add_argument('--number', type=int, default=5,
+                        help='calls per measure')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args()
+
+    body = policies(args.items)
+    operations = (
+        ('list_scalers', lambda c: c.list_scalers(CLOUD_ID)),
+        ('list_clouds', lambda c: c.list_clouds()),
+        ('add_policies', lambda c: c.add_policies('user0', body)),
+    )
+    results = []
+    for compress in (False, True):
+        with FakeFaythe(items=args.items, bandwidth=args.bandwidth,
+                        compress=compress) as server:
+            cli = client.Client(server.endpoint, 'admin', 'secret',
+                                metrics=True, compress_requests=compress)
+            try:
+                for name, operation in operations:
+                    cli.metrics.reset()
+                    seconds = measure(lambda: operation(cli), args.number)
+                    ratios = cli.metrics.compression()
+                    results.append({
+                        'operation': name, 'compression': compress,
+                        'median_ms': seconds * 1e3,
+                        'bytes': ratios['bytes_in'] + ratios['bytes_out'],
+                        'wire_bytes': ratios['wire_bytes_in'] +
+                        ratios['wire_bytes_out']})
+            finally:
+                cli.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print('%-14s %-4s %9.1f ms %9d bytes %9d on the wire (%.1fx)' %
+              (r['operation'], 'on' if r['compression'] else 'off',
+               r['median_ms'], r['bytes'] // args.number,
+               r['wire_bytes'] // args.number,
+               float(r['bytes']) / max(r['wire_bytes'], 1)))
+
+
+if __name__ == '__main__':
+    main()
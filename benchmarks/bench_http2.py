@@ -0,0 +1,177 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Compare the connections opened and the time taken by concurrent
+calls over HTTP/1.1 and HTTP/2.
+
+The fake Faythe API is served by hypercorn, which speaks both HTTP/1.1
+and HTTP/2 over plain http, so the HTTP/2 transport is used with prior
+knowledge ('h2c'). The connections are counted by client port.
+
+The form bodies of AsyncClient.create_user and change_password are
+also checked to reach the server over both transports.
+
+Requires httpx[http2] and hypercorn.
+
+Usage: python benchmarks/bench_http2.py [--calls N] [--workers N]
+       [--latency SECONDS] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+
+from hypercorn import asyncio as hypercorn_asyncio
+from hypercorn import config as hypercorn_config
+
+from faytheclient import batch
+from faytheclient import client
+from faytheclient.aio import client as aio_client
+
+from bench_codec import SCALER
+from fake_faythe import listing, SUCCESS, TOKEN
+
+
+class App(object):
+    """A minimal ASGI fake of the Faythe API."""
+
+    def __init__(self, items, latency):
+        self.latency = latency
+        self.scalers = listing(SCALER, items)
+        self.connections = set()
+        self.versions = set()
+        # The form bodies received.
+        self.forms = []
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        self.connections.add(tuple(scope['client']))
+        self.versions.add(scope['http_version'])
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        if (b'content-type', b'application/x-www-form-urlencoded') in \
+                scope['headers']:
+            self.forms.append(body)
+        await asyncio.sleep(self.latency)
+        headers = [(b'content-type', b'application/json')]
+        if scope['path'] == '/tokens':
+            body = SUCCESS
+            headers.append((b'authorization', TOKEN.encode()))
+        else:
+            body = self.scalers
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def serve(app):
+    """Serve an app in a thread, return its endpoint."""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    config = hypercorn_config.Config()
+    config.bind = ['127.0.0.1:%d' % port]
+    config.loglevel = 'ERROR'
+    config.h2_max_concurrent_streams = 1000
+    # Served until the benchmark exits, without the signal handlers
+    # which only work in the main thread.
+    thread = threading.Thread(target=lambda: asyncio.run(
+        hypercorn_asyncio.serve(app, config,
+                                shutdown_trigger=asyncio.Event().wait)))
+    thread.daemon = True
+    thread.start()
+    endpoint = 'http://127.0.0.1:%d' % port
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return endpoint
+
+
+async def send_forms(endpoint, transport):
+    async with aio_client.AsyncClient(endpoint, 'admin', 'secret',
+                                      transport=transport) as cli:
+        await cli.create_user({'username': 'new', 'password': 'secret'})
+        await cli.change_password('new', 'changed')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=500,
+                        help='number of list_scalers calls')
+    parser.add_argument('--workers', type=int, default=100,
+                        help='number of concurrent calls')
+    parser.add_argument('--items', type=int, default=10,
+                        help='number of items in the listing')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='seconds every response is delayed')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    for transport in ('http1', 'h2c'):
+        app = App(args.items, args.latency)
+        endpoint = serve(app)
+        cli = client.Client(endpoint, 'admin', 'secret',
+                            transport=transport, pool_maxsize=args.workers)
+        try:
+            started_at = time.perf_counter()
+            failed = [r for r in batch.fan_out(
+                lambda i: cli.list_scalers('%032x' % i),
+                range(args.calls), max_workers=args.workers)
+                if not r.ok]
+            seconds = time.perf_counter() - started_at
+        finally:
+            cli.close()
+        result = {'transport': transport,
+                  'versions': sorted(app.versions),
+                  'connections': len(app.connections),
+                  'seconds': seconds, 'failed': len(failed)}
+        asyncio.run(send_forms(endpoint, transport))
+        result['forms_ok'] = app.forms == [b'username=new&password=secret',
+                                           b'newpassword=changed']
+        results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print('%-6s HTTP/%-8s %4d connections %7.3fs %d failed, forms %s'
+              % (r['transport'], ','.join(r['versions']), r['connections'],
+                 r['seconds'], r['failed'],
+                 'ok' if r['forms_ok'] else 'NOT received'))
+    if not all(r['forms_ok'] for r in results):
+        raise SystemExit('The form bodies were not received')
+
+
+if __name__ == '__main__':
+    main()
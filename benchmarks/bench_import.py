@@ -0,0 +1,129 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Measure the import time of the faytheclient modules.
+
+Every module is imported --number times, each time in a new
+interpreter, with `python -X importtime`. The cumulative import time
+of the module and its slowest dependencies are reported.
+
+The script exits with an error if a module imports one of the
+dependencies it should load on demand, see MODULES, or if an import
+takes longer than --max-ms.
+
+Usage: python benchmarks/bench_import.py [--number N] [--max-ms MS]
+       [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules and the dependencies they must only import on demand.
+MODULES = (
+    ('faytheclient', ('pbr', 'requests', 'asyncio', 'importlib.metadata')),
+    ('faytheclient.client', ('pbr', 'asyncio', 'six', 'argparse',
+                             'sqlite3', 'httpx')),
+    ('faytheclient.shell', ('pbr', 'asyncio', 'six')),
+)
+
+
+def import_times(module):
+    """Import a module in a new interpreter.
+
+    :returns: A dict mapping the module and the modules it imported to
+              their cumulative import time in microseconds. The modules
+              loaded by the interpreter startup are left out.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        stderr=subprocess.PIPE, env=env, universal_newlines=True,
+        check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            # The header line.
+            continue
+        times[name.strip()] = int(cumulative)
+        # A module is listed after its dependencies, the top level
+        # modules aren't indented.
+        if not name.startswith('  '):
+            if name.strip() == module:
+                return times
+            times = {}
+    raise RuntimeError('%s is missing from the import times' % module)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=10,
+                        help='imports per module')
+    parser.add_argument('--top', type=int, default=5,
+                        help='slowest dependencies reported per module')
+    parser.add_argument('--max-ms', type=float,
+                        help='fail if a median import time is higher')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    errors = []
+    for module, heavy in MODULES:
+        runs = [import_times(module) for _ in range(args.number)]
+        median = statistics.median(run[module] for run in runs) / 1000.0
+        last = runs[-1]
+        dependencies = sorted(
+            ((name, t) for name, t in last.items()
+             if name != module and '.' not in name),
+            key=lambda item: item[1], reverse=True)[:args.top]
+        loaded = sorted(name for name in heavy if name in last)
+        results.append({'module': module, 'median_ms': round(median, 3),
+                        'slowest': [{'module': name, 'ms': t / 1000.0}
+                                    for name, t in dependencies],
+                        'heavy': loaded})
+        if loaded:
+            errors.append('%s imports %s' % (module, ', '.join(loaded)))
+        if args.max_ms is not None and median > args.max_ms:
+            errors.append('%s takes %.1f ms to import, more than %.1f ms'
+                          % (module, median, args.max_ms))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            print('%-24s %8.1f ms  slowest: %s' % (
+                r['module'], r['median_ms'],
+                ', '.join('%s %.1f ms' % (d['module'], d['ms'])
+                          for d in r['slowest'])))
+    if errors:
+        raise SystemExit('\n'.join(errors))
+
+
+if __name__ == '__main__':
+    main()
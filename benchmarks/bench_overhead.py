@@ -0,0 +1,116 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Measure the client overhead of a call, with and without the
+prepared request templates.
+
+The listings of the fake Faythe API hold a single item, so the time of
+a call is mostly spent in the client. A raw http.client round trip to
+the same server is measured as the floor.
+
+Usage: python benchmarks/bench_overhead.py [--number N] [--json]
+"""
+
+import argparse
+import http.client
+import json
+import time
+import urllib.parse
+
+from faytheclient import client
+
+from fake_faythe import FakeFaythe, TOKEN
+
+CLOUD_ID = '%032x' % 0
+
+OPERATIONS = (
+    ('list_clouds', lambda c: c.list_clouds()),
+    ('list_clouds_tags',
+     lambda c: c.list_clouds(tags=['test', 'production'])),
+    ('list_scalers', lambda c: c.list_scalers(CLOUD_ID)),
+    ('update_scaler',
+     lambda c: c.update_scaler(CLOUD_ID + '/abc', {'duration': '5m'})),
+)
+
+
+def measure(func, number):
+    """Return the median and best seconds per call."""
+    for _ in range(min(number, 100)):
+        func()
+    samples = []
+    for _ in range(number):
+        started_at = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started_at)
+    samples.sort()
+    return samples[len(samples) // 2], samples[0]
+
+
+def raw_round_trip(endpoint):
+    address = urllib.parse.urlsplit(endpoint)
+    conn = http.client.HTTPConnection(address.hostname, address.port)
+
+    def call():
+        conn.request('GET', '/clouds', headers={'Authorization': TOKEN})
+        conn.getresponse().read()
+
+    return conn, call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=2000,
+                        help='calls per measure')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    with FakeFaythe(items=1) as server:
+        conn, call = raw_round_trip(server.endpoint)
+        median, best = measure(call, args.number)
+        conn.close()
+        results.append({'operation': 'raw http.client', 'templates': None,
+                        'median_us': median * 1e6, 'best_us': best * 1e6})
+        for name, operation in OPERATIONS:
+            for templates in (0, 256):
+                cli = client.Client(server.endpoint, 'admin', 'secret',
+                                    request_templates=templates)
+                try:
+                    median, best = measure(lambda: operation(cli),
+                                           args.number)
+                finally:
+                    cli.close()
+                results.append({'operation': name,
+                                'templates': bool(templates),
+                                'median_us': median * 1e6,
+                                'best_us': best * 1e6})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        templates = {None: '', False: 'off', True: 'on'}[r['templates']]
+        print('%-18s %-4s %9.1f us p50 %9.1f us best' %
+              (r['operation'], templates, r['median_us'], r['best_us']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Compare utils.generate_url with the previous implementation.
+
+Every route built by faytheclient.client.Client is measured, with the
+memoized urls and with the memo cleared before every call.
+
+Usage: python benchmarks/bench_url.py [--number N] [--json]
+"""
+
+import argparse
+import json
+import timeit
+
+from faytheclient import utils
+
+CLOUD_ID = '3b8c2d5d64c0e8a1e9f0a5c3d0b5e9a1'
+
+# (route, args, kwargs, expected url)
+ROUTES = (
+    ('/clouds', (), {}, '/clouds'),
+    ('/clouds', (), {'provider': 'openstack', 'id': CLOUD_ID,
+                     'tags': ['test', 'production'],
+                     'tags_any': ['hn', 'hcm']},
+     '/clouds?provider=openstack&id=%s&tags=test,production'
+     '&tags_any=hn,hcm' % CLOUD_ID),
+    ('/clouds', ('openstack',), {}, '/clouds/openstack'),
+    ('/clouds', (CLOUD_ID,), {}, '/clouds/%s' % CLOUD_ID),
+    ('/scalers', (CLOUD_ID,), {}, '/scalers/%s' % CLOUD_ID),
+    ('/scalers', (CLOUD_ID,), {'tags': ['test']},
+     '/scalers/%s?tags=test' % CLOUD_ID),
+    ('/scalers', (CLOUD_ID + '/abc',), {},
+     '/scalers/%s/abc' % CLOUD_ID),
+    ('/healers', (CLOUD_ID,), {}, '/healers/%s' % CLOUD_ID),
+    ('/silences', (CLOUD_ID,), {}, '/silences/%s' % CLOUD_ID),
+    ('/users', (), {}, '/users'),
+    ('/users', ('john doe',), {}, '/users/john%20doe'),
+    ('/users', ('john', 'change_password'), {},
+     '/users/john/change_password'),
+    ('/policies', ('john',), {}, '/policies/john'),
+)
+
+
+def legacy_generate_url(url, *args, **kwargs):
+    url = url.rstrip('/')
+    if args:
+        url = '/'.join([url, *args])
+    if kwargs:
+        for k, v in kwargs.items():
+            if k == list(kwargs.keys())[0]:
+                url += "?{}={}" . format(k, v)
+                continue
+            url += "&{}={}" . format(k, v)
+    return url
+
+
+def uncached_generate_url(url, *args, **kwargs):
+    utils._build_url.cache_clear()
+    return utils.generate_url(url, *args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=0,
+                        help='iterations per measure, 0 to autorange')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args()
+
+    for route, route_args, kwargs, expected in ROUTES:
+        url = utils.generate_url(route, *route_args, **kwargs)
+        if url != expected:
+            raise SystemExit('%s: got %s, expected %s' %
+                             (route, url, expected))
+
+    results = []
+    for route, route_args, kwargs, expected in ROUTES:
+        for name, func in (('legacy', legacy_generate_url),
+                           ('uncached', uncached_generate_url),
+                           ('cached', utils.generate_url)):
+            timer = timeit.Timer(lambda: func(route, *route_args, **kwargs))
+            number = args.number or timer.autorange()[0]
+            best = min(timer.repeat(repeat=5, number=number)) / number
+            results.append({'url': expected, 'implementation': name,
+                            'usec': round(best * 1e6, 3)})
+            if not args.json:
+                print('%-72s %-8s %8.3f us' % (expected[:72], name,
+                                               best * 1e6))
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Measure a controller loop updating a few scalers over and over,
+with synchronous calls and with the write-behind queue.
+
+The loop runs for --seconds, updating the scalers in turn. The number
+of updates made by the loop, the requests received by the fake Faythe
+API and the time taken by an update call are reported.
+
+Usage: python benchmarks/bench_writebehind.py [--scalers N]
+       [--seconds S] [--latency SECONDS] [--json]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from faytheclient import client
+
+from fake_faythe import FakeFaythe, _Handler
+
+CLOUD_ID = '%032x' % 0
+
+
+class _CountingHandler(_Handler):
+
+    def _mutate(self):
+        if self._resource() != 'tokens':
+            self.server.mutations += 1
+        super(_CountingHandler, self)._mutate()
+
+    do_POST = do_PUT = do_DELETE = _mutate
+
+
+def run(endpoint, write_behind, scalers, seconds):
+    cli = client.Client(endpoint, 'admin', 'secret',
+                        write_behind=write_behind)
+    update = cli.write_behind.update_scaler if write_behind else \
+        cli.update_scaler
+    samples = []
+    stop_at = time.monotonic() + seconds
+    i = 0
+    try:
+        while time.monotonic() < stop_at:
+            started_at = time.perf_counter()
+            update('%s/%d' % (CLOUD_ID, i % scalers), {'duration': '%ds' % i})
+            samples.append(time.perf_counter() - started_at)
+            i += 1
+    finally:
+        cli.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scalers', type=int, default=20,
+                        help='number of updated scalers')
+    parser.add_argument('--seconds', type=float, default=2.0,
+                        help='duration of every run')
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='seconds every response is delayed')
+    parser.add_argument('--json', action='store_true',
+                        help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    for write_behind in (False, True):
+        server = FakeFaythe(items=1, latency=args.latency)
+        server.RequestHandlerClass = _CountingHandler
+        server.mutations = 0
+        with server:
+            samples = run(server.endpoint, write_behind, args.scalers,
+                          args.seconds)
+            results.append({'write_behind': write_behind,
+                            'updates': len(samples),
+                            'requests': server.mutations,
+                            'median_us': statistics.median(samples) * 1e6})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print('write-behind %-3s %8d updates %6d requests %9.1f us/update'
+              % ('on' if r['write_behind'] else 'off', r['updates'],
+                 r['requests'], r['median_us']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""An in-process fake of the Faythe API for the benchmarks.
+
+The listings are generated once with a configurable number of items,
+the mutations are accepted without being stored so every iteration of
+a benchmark sees the same responses.
+
+The server can gzip its responses and simulate a slow link, both the
+requests and the responses bodies then take their size divided by the
+bandwidth to transfer.
+
+Usage: python benchmarks/fake_faythe.py [--port N] [--items N]
+       [--bandwidth BYTES] [--gzip]
+"""
+
+import argparse
+import base64
+import gzip
+import http.server
+import json
+import socketserver
+import threading
+import time
+
+from bench_codec import CLOUD, SCALER
+
+HEALER = {
+    "query": "up{job=~\".*compute-cadvisor.*|.*compute-node.*\"} < 1",
+    "actions": {
+        "mistral": {
+            "delay": "50ms",
+            "type": "mistral",
+            "workflow_id": "fakeworkflowid"
+        }
+    },
+    "evaluation_level": 2,
+    "duration": "3m",
+    "interval": "30s",
+    "receivers": ["admin@example.com"],
+    "tags": ["test"]
+}
+
+SILENCE = {
+    "name": "maintenance",
+    "pattern": "192.168.1.*",
+    "ttl": "1h",
+    "tags": ["test"]
+}
+
+# The fake jwt never expires, so the clients log in once.
+TOKEN = 'Bearer header.%s.signature' % base64.urlsafe_b64encode(
+    json.dumps({'exp': 4102444800}).encode()).decode().rstrip('=')
+SUCCESS = json.dumps({'status': 'success'}).encode()
+
+
+def listing(document, items, padding=0):
+    data = {}
+    for i in range(items):
+        item = dict(document, id='%032x' % i)
+        if padding:
+            item['metadata'] = {'padding': 'x' * padding}
+        data[item['id']] = item
+    return json.dumps({'status': 'success', 'data': data}).encode()
+
+
+class FakeFaythe(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """A fake Faythe API server listening on localhost.
+
+    :param port: The port to listen on, 0 picks a free one.
+    :param items: The number of items returned by every listing.
+    :param latency: The number of seconds every response is delayed.
+    :param padding: The size of a string added to every listed item.
+    :param bandwidth: (optional) The bytes per second of the simulated
+                      link.
+    :param compress: If True, gzip the responses the clients accept
+                     gzip for.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, items=10, latency=0.0, padding=0,
+                 bandwidth=None, compress=False):
+        super(FakeFaythe, self).__init__(('127.0.0.1', port), _Handler)
+        self.latency = float(latency)
+        self.bandwidth = float(bandwidth) if bandwidth else None
+        self.compress = compress
+        # The last request body received, decompressed, and the number
+        # of bytes transferred.
+        self.last_body = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._gzipped = {}
+        users = {'user%d' % i: {'username': 'user%d' % i,
+                                'policies': [['user%d' % i, '/*', 'GET']]}
+                 for i in range(items)}
+        self.listings = {
+            'clouds': listing(CLOUD, items, padding),
+            'scalers': listing(SCALER, items, padding),
+            'healers': listing(HEALER, items, padding),
+            'silences': listing(SILENCE, items, padding),
+            'nsresolvers': listing({'address': '10.0.0.1',
+                                    'name': 'compute'}, items),
+            'users': json.dumps({'status': 'success',
+                                 'data': users}).encode(),
+        }
+        self._thread = None
+
+    def gzipped(self, body):
+        # The listings are compressed once.
+        compressed = self._gzipped.get(body)
+        if compressed is None:
+            compressed = self._gzipped[body] = gzip.compress(body)
+        return compressed
+
+    def transfer(self, size):
+        if self.bandwidth:
+            time.sleep(size / self.bandwidth)
+
+    @property
+    def endpoint(self):
+        return 'http://%s:%d' % self.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    # Keep the connections alive, like the real server.
+    protocol_version = 'HTTP/1.1'
+    # The headers and body are written separately, don't let Nagle's
+    # algorithm delay the body until the client acknowledges them.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=b'', headers=()):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.compress and len(body) >= 1024 and \
+                'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = self.server.gzipped(body)
+            headers = tuple(headers) + (('Content-Encoding', 'gzip'),)
+        self.server.bytes_out += len(body)
+        self.server.transfer(len(body))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return
+        body = self.rfile.read(length)
+        self.server.bytes_in += length
+        self.server.transfer(length)
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        self.server.last_body = body
+
+    def _resource(self):
+        return self.path.lstrip('/').split('?', 1)[0].split('/', 1)[0]
+
+    def _authorized(self):
+        if self.headers.get('Authorization') == TOKEN:
+            return True
+        self._reply(401, json.dumps({'error': 'unauthorized'}).encode())
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        body = self.server.listings.get(self._resource())
+        if body is None:
+            self._reply(404, json.dumps({'error': 'not found'}).encode())
+            return
+        self._reply(200, body)
+
+    def _mutate(self):
+        self._read_body()
+        if self._resource() == 'tokens':
+            self._reply(200, SUCCESS, [('Authorization', TOKEN)])
+            return
+        if not self._authorized():
+            return
+        if self._resource() not in self.server.listings and \
+                self._resource() != 'policies':
+            self._reply(404, json.dumps({'error': 'not found'}).encode())
+            return
+        self._reply(200, SUCCESS)
+
+    do_POST = do_PUT = do_DELETE = _mutate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--items', type=int, default=10,
+                        help='number of items in every listing')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds every response is delayed')
+    parser.add_argument('--padding', type=int, default=0,
+                        help='bytes of padding added to every listed item')
+    parser.add_argument('--bandwidth', type=float,
+                        help='bytes per second of the simulated link')
+    parser.add_argument('--gzip', action='store_true',
+                        help='gzip the responses')
+    args = parser.parse_args()
+    server = FakeFaythe(args.port, args.items, args.latency, args.padding,
+                        args.bandwidth, args.gzip)
+    print('Serving a fake Faythe API on %s' % server.endpoint)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
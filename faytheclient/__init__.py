@@ -18,7 +18,35 @@
 # specific language governing permissions and limitations
 # under the License.
 
-import pbr.version
+import sys
 
 
-__version__ = pbr.version.VersionInfo('faytheclient').version_string()
+def _get_version():
+    # importlib.metadata only reads the installed metadata, pbr is much
+    # slower to import and is kept for source checkouts.
+    try:
+        from importlib import metadata
+    except ImportError:
+        # Python < 3.8
+        metadata = None
+    if metadata is not None:
+        try:
+            return metadata.version('faytheclient')
+        except metadata.PackageNotFoundError:
+            pass
+    import pbr.version
+    return pbr.version.VersionInfo('faytheclient').version_string()
+
+
+def __getattr__(name):
+    # The version is resolved on first access, not at import time.
+    if name == '__version__':
+        global __version__
+        __version__ = _get_version()
+        return __version__
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+if sys.version_info < (3, 7):
+    # Module __getattr__ is not supported (PEP 562).
+    __version__ = _get_version()
@@ -0,0 +1,302 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import functools
+import logging
+import time
+
+import requests
+
+from faytheclient.aio import http
+from faytheclient import auth
+from faytheclient import utils
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncClient(http.AsyncHTTPClient):
+    """Asyncio client for the Faythe API.
+
+    Every method of :class:`faytheclient.client.Client` is available
+    as a coroutine. The jwt is fetched lazily on the first call, so
+    the client can be created outside of a running event loop.
+
+    :param endpoint: A user-supplied endpoint URL for the Faythe service.
+    :param username: A username to generate jwt.
+    :param password: A Faythe password to generate jwt.
+    """
+
+    jwt_expired_at = None
+    headers = None
+
+    def __init__(self, endpoint, username, password, **kwargs):
+        """Initialize a new asyncio client for the Faythe API."""
+        super(AsyncClient, self).__init__(endpoint, **kwargs)
+        self.username = username
+        self.password = password
+        self.token_leeway = float(kwargs.get('token_leeway', 60))
+        self._jwt_lock = None
+
+    async def get_jwt_token(self):
+        """Get and store jwt in the client's headers"""
+        try:
+            resp = await self.post('/tokens',
+                                   auth=(self.username, self.password))
+            token = resp.headers['Authorization']
+            self.headers = {"Authorization": token}
+            self.jwt_expired_at = auth.parse_jwt_expiry(token) or \
+                time.time() + auth.DEFAULT_TTL
+            LOG.debug("Logged into Faythe %s" % self.endpoint)
+        except Exception as e:
+            LOG.exception("Unable to authenticate a user: {}".format(e))
+            raise e
+
+    def _is_jwt_fresh(self):
+        return self.jwt_expired_at is not None and \
+            time.time() < self.jwt_expired_at - self.token_leeway
+
+    async def _ensure_jwt_token(self):
+        if self._is_jwt_fresh():
+            return self.headers
+        if self._jwt_lock is None:
+            self._jwt_lock = asyncio.Lock()
+        # Concurrent coroutines wait for a single login instead of
+        # each one posting to /tokens.
+        async with self._jwt_lock:
+            if not self._is_jwt_fresh():
+                await self.get_jwt_token()
+        return self.headers
+
+    def _invalidate_jwt_token(self, headers):
+        if headers is self.headers:
+            self.jwt_expired_at = None
+
+    class decorator(object):
+        @staticmethod
+        def refresh_jwt_token(decorated_func):
+            @functools.wraps(decorated_func)
+            async def wrapper(api, *args, **kwargs):
+                headers = await api._ensure_jwt_token()
+                try:
+                    return await decorated_func(api, *args, **kwargs)
+                except requests.exceptions.HTTPError as e:
+                    # The jwt may have been revoked or the server clock
+                    # may differ, log in again and retry once.
+                    if e.response is None or e.response.status_code != 401:
+                        raise
+                    api._invalidate_jwt_token(headers)
+                    await api._ensure_jwt_token()
+                    return await decorated_func(api, *args, **kwargs)
+
+            return wrapper
+
+    @decorator.refresh_jwt_token
+    async def list_clouds(self, **kwargs):
+        """List all clouds that are registerd to Faythe
+
+        See :meth:`faytheclient.client.Client.list_clouds`.
+        """
+        url = utils.generate_url('/clouds', **kwargs)
+        return await self.get_json(url, headers=self.headers)
+
+    @decorator.refresh_jwt_token
+    async def register_cloud(self, provider, body):
+        """Register a new cloud to Faythe
+
+        :param provider: The cloud provider type. 'OpenStack' is the only
+                         provider supported by now.
+        :param body: A dictionary object.
+        """
+        url = utils.generate_url('/clouds', provider)
+        return (await self.post(url, body=body, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def unregister_cloud(self, id):
+        """Remove a cloud from Faythe
+
+        :param id: The id of cloud.
+        """
+        url = utils.generate_url('/clouds', id)
+        return (await self.delete(url, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def update_cloud(self, id, body=None):
+        """Update a cloud information
+
+        :param id: The id of cloud.
+        :param body: (optional) A dictionary object. If it
+                     is None, the cloud won't be updated.
+        """
+        url = utils.generate_url('/clouds', id)
+        return (await self.put(url, body=body, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def create_scaler(self, cloud_id, body):
+        """Create a scaler belong to a cloud.
+
+        :param cloud_id: The id of cloud.
+        :param body: A dictionary object.
+        """
+        url = utils.generate_url('/scalers', cloud_id)
+        return (await self.post(url, body=body, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def list_scalers(self, cloud_id, **kwargs):
+        """List all scalers belong to a cloud.
+
+        See :meth:`faytheclient.client.Client.list_scalers`.
+        """
+        url = utils.generate_url('/scalers', cloud_id, **kwargs)
+        return await self.get_json(url, headers=self.headers)
+
+    @decorator.refresh_jwt_token
+    async def delete_scaler(self, cloud_id):
+        """Delete a scaler."""
+        url = utils.generate_url('/scalers', cloud_id)
+        return (await self.delete(url, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def update_scaler(self, cloud_id, body=None):
+        """Update a scaler information.
+
+        :param cloud_id: The id of cloud.
+        :param body: (optional) A dictionary object. If it
+                     is None, the scaler won't be updated.
+        """
+        url = utils.generate_url('/scalers', cloud_id)
+        return (await self.put(url, body=body, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def list_nresolvers(self):
+        """List all nresovlers (name resolvers)."""
+        return await self.get_json('/nsresolvers', headers=self.headers)
+
+    @decorator.refresh_jwt_token
+    async def list_healers(self, cloud_id):
+        """List all healers belong to a cloud.
+
+        :param cloud_id: The id of cloud.
+        """
+        return await self.get_json('/healers', headers=self.headers)
+
+    @decorator.refresh_jwt_token
+    async def create_healer(self, cloud_id, body):
+        """Create a new healer belongs to a cloud.
+
+        :param cloud_id: The id of cloud.
+        :param body: A dictionary object.
+        """
+        url = utils.generate_url('/healers', cloud_id)
+        return (await self.post(url, body=body, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def delete_healers(self, cloud_id):
+        """Delete a healer.
+
+        :param cloud_id: The id of cloud.
+        """
+        url = utils.generate_url('/healers', cloud_id)
+        return (await self.delete(url, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def create_silence(self, cloud_id, body):
+        """Create a silencer to ignore healing action.
+
+        :param cloud_id: The id of cloud.
+        :param body: A dictionary object.
+        """
+        url = utils.generate_url('/silences', cloud_id)
+        return (await self.post(url, body=body, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def list_silences(self, cloud_id):
+        """List all silencers belong to a cloud.
+
+        :param cloud_id: The id of cloud.
+        """
+        url = utils.generate_url('/silences', cloud_id)
+        return await self.get_json(url, headers=self.headers)
+
+    @decorator.refresh_jwt_token
+    async def delete_silence(self, cloud_id):
+        """Delete a healer belong to a cloud.
+
+        :param cloud_id: The id of cloud.
+        """
+        url = utils.generate_url('/silences', cloud_id)
+        return (await self.delete(url, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def list_users(self):
+        """List all Faythe users with policies."""
+        url = utils.generate_url('/users')
+        return await self.get_json(url, headers=self.headers)
+
+    @decorator.refresh_jwt_token
+    async def create_user(self, user):
+        """Create new Faythe user.
+
+        :param user: A dict of user information.
+                     for example: {'username': 'new', 'password': 'secret'}
+        """
+        url = utils.generate_url('/users')
+        return (await self.post(url, headers=self.headers, data=user)).json()
+
+    @decorator.refresh_jwt_token
+    async def delete_user(self, username):
+        """Delete an existing user.
+
+        :param username: The name of user.
+        """
+        url = utils.generate_url('/users', username)
+        return (await self.delete(url, headers=self.headers)).json()
+
+    @decorator.refresh_jwt_token
+    async def change_password(self, username, newpassword):
+        """Change user's password.
+
+        :param username: The name of user.
+        :param newpassword: The new password.
+        """
+        url = utils.generate_url('/users', username, 'change_password')
+        return await self.put(url, headers=self.headers,
+                              data={'newpassword': newpassword})
+
+    @decorator.refresh_jwt_token
+    async def add_policies(self, username, body):
+        """Add a set of policies.
+
+        :param username: The name of user.
+        :param body: A list of dictionary object.
+        """
+        url = utils.generate_url('/policies', username)
+        return (await self.post(url, headers=self.headers, body=body)).json()
+
+    @decorator.refresh_jwt_token
+    async def remove_policies(self, username, body):
+        """Remove a set of policies.
+
+        :param username: The name of user.
+        :param body: A list of dictionary object.
+        """
+        url = utils.generate_url('/policies', username)
+        return (await self.delete(url, headers=self.headers,
+                                  body=body)).json()
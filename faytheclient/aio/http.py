@@ -0,0 +1,258 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import asyncio
+import logging
+import socket
+
+import aiohttp
+import requests
+
+from faytheclient import codec as json_codec
+from faytheclient import coalesce
+from faytheclient import compression
+from faytheclient import exceptions
+from faytheclient.http import USER_AGENT
+
+LOG = logging.getLogger(__name__)
+
+
+class Response(object):
+    """A fully read response returned by the AsyncHTTPClient.
+
+    The body is read before the underlying connection is released back
+    to the pool, so the object can be used outside of the event loop
+    just like a `requests.Response`.
+    """
+
+    def __init__(self, method, url, status_code, reason, headers, content,
+                 codec=None):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.codec = codec or json_codec.get_codec('json')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return self.codec.loads(self.content)
+
+
+class AsyncHTTPClient(object):
+    def __init__(self, endpoint, **kwargs):
+        self.endpoint = endpoint.strip('/')
+        if not endpoint.startswith('http') and not endpoint.startswith('https'):
+            self.endpoint = 'http://{}'.format(endpoint)
+        # The read and connection timeouts, see HTTPClient.
+        self.timeout = float(kwargs.get('timeout', 600))
+        self.connect_timeout = float(kwargs.get('connect_timeout') or
+                                     self.timeout)
+        # Maximum number of simultaneous connections kept by the pool.
+        self.pool_maxsize = int(kwargs.get('pool_maxsize', 100))
+        self.codec = json_codec.get_codec(kwargs.get('codec', 'auto'))
+        # Share one request between concurrent identical get_json calls.
+        self.coalescer = kwargs.get('coalesce')
+        if self.coalescer is True:
+            self.coalescer = coalesce.AsyncSingleFlight()
+        elif not self.coalescer:
+            self.coalescer = None
+        # Compress the request bodies, see HTTPClient. aiohttp decodes
+        # and advertises the response encodings itself.
+        self.compressor = kwargs.get('compress_requests')
+        encoding = kwargs.get('compress_encoding', 'gzip')
+        if self.compressor is True:
+            self.compressor = compression.RequestCompressor(
+                encoding=encoding)
+        elif isinstance(self.compressor, int) and self.compressor:
+            self.compressor = compression.RequestCompressor(
+                min_size=self.compressor, encoding=encoding)
+        elif not self.compressor:
+            self.compressor = None
+        # 'http2' or 'h2c' to send the requests with httpx, see
+        # faytheclient.http2, aiohttp only speaks HTTP/1.1.
+        self.transport = kwargs.get('transport', 'http1')
+        if self.transport not in ('http1', 'http2', 'h2c'):
+            raise ValueError("Unknown transport %r, expecting http1, "
+                             "http2 or h2c" % (self.transport,))
+        self.ssl_context = kwargs.get('ssl_context')
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_session(self):
+        # The session has to be created from within a running event loop.
+        if self.transport != 'http1':
+            if self.session is None or self.session.is_closed:
+                # Imported on demand, httpx is an optional dependency.
+                from faytheclient import http2
+                self.session = http2.create_async_client(
+                    pool_maxsize=self.pool_maxsize,
+                    timeout=(self.connect_timeout, self.timeout),
+                    ssl_context=self.ssl_context,
+                    prior_knowledge=self.transport == 'h2c')
+                self.session.headers['User-Agent'] = USER_AGENT
+            return self.session
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": USER_AGENT},
+                # Like requests, a slow download isn't cut as long as
+                # data keeps coming.
+                timeout=aiohttp.ClientTimeout(
+                    total=None, sock_connect=self.connect_timeout,
+                    sock_read=self.timeout))
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            try:
+                if self.transport != 'http1':
+                    await self.session.aclose()
+                else:
+                    await self.session.close()
+            except Exception as e:
+                LOG.exception(e)
+            finally:
+                self.session = None
+
+    async def _request(self, method, url, body=None, **kwargs):
+        """Send an http request with the specified characteristics.
+        """
+        headers = dict(kwargs.pop('headers', None) or {})
+        if headers.get('Content-Type', 'application/json') is None:
+            headers['Content-Type'] = 'application/json'
+        if body is not None:
+            kwargs['data'] = self.codec.dumps(body)
+            headers.setdefault('Content-Type', 'application/json')
+            if self.compressor is not None:
+                kwargs['data'] = self.compressor.compress(kwargs['data'],
+                                                          headers)
+        auth = kwargs.pop('auth', None)
+        if isinstance(auth, tuple) and self.transport == 'http1':
+            auth = aiohttp.BasicAuth(*auth)
+        if self.endpoint.endswith("/") or url.startswith("/"):
+            conn_url = "%s%s" % (self.endpoint, url)
+        else:
+            conn_url = "%s/%s" % (self.endpoint, url)
+        session = self._get_session()
+        try:
+            if self.transport != 'http1':
+                from faytheclient import http2
+                resp = await http2.send_async(session, method, conn_url,
+                                              headers=headers, auth=auth,
+                                              **kwargs)
+                status, reason = resp.status_code, resp.reason_phrase
+                content = resp.content
+            else:
+                async with session.request(method, conn_url,
+                                           headers=headers, auth=auth,
+                                           **kwargs) as resp:
+                    content = await resp.read()
+                status, reason = resp.status, resp.reason
+        except (asyncio.TimeoutError, requests.exceptions.Timeout) as e:
+            message = ("Error communicating with %(url)s: %(e)s" %
+                       dict(url=conn_url, e=e))
+            raise exceptions.InvalidEndpoint(message=message)
+        except (aiohttp.ClientConnectionError,
+                requests.exceptions.ConnectionError) as e:
+            message = ("Error finding address for %(url)s: %(e)s" %
+                       dict(url=conn_url, e=e))
+            raise exceptions.CommunicationError(message=message)
+        except socket.gaierror as e:
+            message = "Error finding address for %s: %s" % (
+                self.endpoint, e)
+            raise exceptions.InvalidEndpoint(message=message)
+        except (socket.error, socket.timeout, IOError) as e:
+            endpoint = self.endpoint
+            message = ("Error communicating with %(endpoint)s %(e)s" %
+                       {'endpoint': endpoint, 'e': e})
+            raise exceptions.CommunicationError(message=message)
+
+        response = Response(method, str(resp.url), status, reason,
+                            resp.headers, content, self.codec)
+        LOG.debug('%(method)s call to image for %(url)s.',
+                  {'method': method, 'url': response.url})
+        return self._handle_response(response)
+
+    def _handle_response(self, response):
+        if response.ok:
+            return response
+        # Keep the message format of requests.Response.raise_for_status
+        # so both clients raise the same errors.
+        if response.status_code < 500:
+            kind = 'Client Error'
+        else:
+            kind = 'Server Error'
+        err_msg = "%s %s: %s for url: %s" % (
+            response.status_code, kind, response.reason, response.url)
+
+        # Attempt to get Error message from response
+        try:
+            error_dict = response.json()
+        except ValueError:
+            pass
+        else:
+            err_msg += " [Error: {}]".format(error_dict)
+        raise requests.exceptions.HTTPError(err_msg, response=response)
+
+    async def get_json(self, url, **kwargs):
+        """GET an url and return its decoded JSON body.
+
+        See :meth:`faytheclient.http.HTTPClient.get_json`.
+        """
+        if self.coalescer is None:
+            return (await self.get(url, **kwargs)).json()
+        key = coalesce.request_key('GET', url, kwargs.get('headers'))
+        return await self.coalescer.do(key, self._get_json, url, **kwargs)
+
+    async def _get_json(self, url, **kwargs):
+        return (await self.get(url, **kwargs)).json()
+
+    async def head(self, url, **kwargs):
+        return await self._request('HEAD', url, **kwargs)
+
+    async def get(self, url, **kwargs):
+        return await self._request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self._request('POST', url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self._request('PUT', url, **kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await self._request('PATCH', url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self._request('DELETE', url, **kwargs)
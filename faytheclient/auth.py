@@ -0,0 +1,174 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import base64
+import json
+import logging
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+# Lifetime assumed for a jwt without a readable 'exp' claim.
+DEFAULT_TTL = 60 * 40  # 40 minutes
+
+
+def parse_jwt_expiry(token):
+    """Return the 'exp' claim of a jwt as a timestamp.
+
+    :param token: A jwt, optionally prefixed by its 'Bearer' scheme.
+    :returns: The expiry timestamp or None if it can't be read. The
+              signature is not verified, the server does it.
+    """
+    try:
+        payload = token.split()[-1].split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode()))
+        return float(claims['exp'])
+    except (IndexError, KeyError, TypeError, ValueError) as e:
+        LOG.debug("Unable to read the jwt expiry: {}".format(e))
+        return None
+
+
+class TokenManager(object):
+    """Keep a valid jwt, refreshing it once for all threads.
+
+    :param fetch: A callable logging into Faythe and returning the
+                  value of the Authorization header.
+    :param leeway: Number of seconds before the expiry at which the
+                   token is refreshed.
+    :param background: If True, a timer thread refreshes the token
+                       before it expires, so callers never wait for it.
+    :param retry_interval: Delay before retrying a failed background
+                           refresh.
+    :param store: (optional) A :class:`faytheclient.shared.SharedStore`
+                  to share the token with the other processes.
+    :param store_key: The key of the token in the store, e.g. the
+                      endpoint and the username.
+    """
+
+    def __init__(self, fetch, leeway=60, background=False,
+                 retry_interval=10, store=None, store_key=''):
+        self.fetch = fetch
+        self.store = store
+        self.store_key = store_key
+        self.leeway = float(leeway)
+        self.background = background
+        self.retry_interval = float(retry_interval)
+        self.token = None
+        self.expires_at = None
+        self.headers = None
+        self.refresh_count = 0
+        self._lock = threading.Lock()
+        self._timer = None
+        self._closed = False
+
+    def _is_fresh(self):
+        return self.expires_at is not None and \
+            time.time() < self.expires_at - self.leeway
+
+    def get(self):
+        """Return a valid token, logging in only if it is needed."""
+        if not self._is_fresh():
+            with self._lock:
+                # Another thread may have refreshed it while we waited.
+                if not self._is_fresh():
+                    self._refresh()
+        return self.token
+
+    def refresh(self):
+        """Unconditionally log in again."""
+        with self._lock:
+            self._refresh()
+        return self.token
+
+    def invalidate(self, token):
+        """Mark the token as expired if it is still the current one.
+
+        Used after the server rejected a token, the check prevents
+        threads holding the same rejected token to refresh it twice.
+        """
+        with self._lock:
+            if token == self.token:
+                self.expires_at = None
+        if self.store is not None:
+            self.store.delete_token(self.store_key, token)
+
+    def _shared_token(self):
+        # A token stored by another process, if it is fresh and newer
+        # than the one being refreshed.
+        shared = self.store.get_token(self.store_key)
+        if shared is None or shared[0] == self.token or \
+                time.time() >= shared[1] - self.leeway:
+            return None
+        return shared[0]
+
+    def _fetch_shared(self):
+        token = self._shared_token()
+        if token is not None:
+            return token
+        # Log in once for all the processes.
+        with self.store.lock():
+            token = self._shared_token()
+            if token is None:
+                token = self.fetch()
+                self.store.set_token(
+                    self.store_key, token,
+                    parse_jwt_expiry(token) or time.time() + DEFAULT_TTL)
+            return token
+
+    def _refresh(self):
+        if self.store is None:
+            token = self.fetch()
+        else:
+            token = self._fetch_shared()
+        expires_at = parse_jwt_expiry(token)
+        if expires_at is None:
+            expires_at = time.time() + DEFAULT_TTL
+        self.token = token
+        self.headers = {"Authorization": token}
+        self.expires_at = expires_at
+        self.refresh_count += 1
+        if self.background:
+            # Never spin if the token lifetime is shorter than the leeway.
+            self._schedule(max(expires_at - self.leeway - time.time(), 1))
+
+    def _schedule(self, delay):
+        if self._closed:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            LOG.warning("Unable to refresh the jwt: {}".format(e))
+            self._schedule(self.retry_interval)
+
+    def close(self):
+        """Stop the background refresh."""
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,154 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Spread the requests over several Faythe API replicas.
+
+The health of the replicas is tracked passively, from the outcome of
+the requests: a replica failing `eject_after` times in a row is left
+out for `eject_for` seconds, then it is tried again.
+"""
+
+import logging
+import random
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+LEAST_OUTSTANDING = 'least_outstanding'
+LATENCY = 'latency'
+STRATEGIES = (LEAST_OUTSTANDING, LATENCY)
+# Weight of the last request in the latency moving average.
+EWMA_ALPHA = 0.3
+
+
+class Replica(object):
+    """A Faythe API replica and its observed health.
+
+    :param endpoint: The normalized endpoint url.
+    """
+
+    __slots__ = ('endpoint', 'outstanding', 'latency', 'failures',
+                 'ejected_until', 'token_manager')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.outstanding = 0
+        # Moving average of the latency, None until a request is done.
+        self.latency = None
+        self.failures = 0
+        self.ejected_until = 0.0
+        # Set by the Client when every replica has its own jwt.
+        self.token_manager = None
+
+    def is_ejected(self, now):
+        return now < self.ejected_until
+
+    def __repr__(self):
+        return '<Replica %s>' % self.endpoint
+
+
+class Balancer(object):
+    """Pick the replica of every request.
+
+    :param endpoints: A list of normalized endpoint urls.
+    :param strategy: 'least_outstanding' sends a request to the replica
+                     with the fewest requests in flight. 'latency'
+                     compares two replicas picked at random and sends
+                     it to the one with the lowest latency, weighted by
+                     its requests in flight.
+    :param eject_after: The number of consecutive failures ejecting a
+                        replica.
+    :param eject_for: The number of seconds a replica is ejected.
+    """
+
+    def __init__(self, endpoints, strategy=LEAST_OUTSTANDING,
+                 eject_after=3, eject_for=30):
+        if strategy not in STRATEGIES:
+            raise ValueError("Unknown balancing strategy %r, expecting "
+                             "one of %s" % (strategy, ', '.join(STRATEGIES)))
+        self.replicas = [Replica(endpoint) for endpoint in endpoints]
+        self.strategy = strategy
+        self.eject_after = max(int(eject_after), 1)
+        self.eject_for = float(eject_for)
+        self._lock = threading.Lock()
+
+    def _score(self, replica):
+        if self.strategy == LEAST_OUTSTANDING:
+            return replica.outstanding
+        # Unknown replicas are tried first.
+        return (replica.latency or 0.0) * (replica.outstanding + 1)
+
+    def pick(self, exclude=(), replica=None):
+        """Return the replica of a request, it has to be released.
+
+        :param exclude: Replicas not to pick, e.g. the ones which
+                        already failed for this request.
+        :param replica: (optional) The replica the request is pinned to.
+        """
+        with self._lock:
+            if replica is not None:
+                replica.outstanding += 1
+                return replica
+            now = time.monotonic()
+            candidates = [r for r in self.replicas if r not in exclude]
+            healthy = [r for r in candidates if not r.is_ejected(now)]
+            # If every replica is ejected, try them anyway.
+            candidates = healthy or candidates or self.replicas
+            if self.strategy == LATENCY and len(candidates) > 2:
+                candidates = random.sample(candidates, 2)
+            else:
+                # Break the ties at random.
+                candidates = random.sample(candidates, len(candidates))
+            replica = min(candidates, key=self._score)
+            replica.outstanding += 1
+            return replica
+
+    def release(self, replica, latency, failed=False):
+        """Record the outcome of a request sent to a replica."""
+        with self._lock:
+            replica.outstanding -= 1
+            if failed:
+                replica.failures += 1
+                if replica.failures >= self.eject_after:
+                    if not replica.is_ejected(time.monotonic()):
+                        LOG.warning("Ejecting %s for %ss after %d "
+                                    "failures" % (replica.endpoint,
+                                                  self.eject_for,
+                                                  replica.failures))
+                    replica.ejected_until = time.monotonic() + \
+                        self.eject_for
+                return
+            replica.failures = 0
+            replica.ejected_until = 0.0
+            if replica.latency is None:
+                replica.latency = latency
+            else:
+                replica.latency += EWMA_ALPHA * (latency - replica.latency)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return [{'endpoint': r.endpoint,
+                     'outstanding': r.outstanding,
+                     'latency': r.latency,
+                     'failures': r.failures,
+                     'ejected': r.is_ejected(now)}
+                    for r in self.replicas]
@@ -0,0 +1,150 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import concurrent.futures
+import logging
+
+LOG = logging.getLogger(__name__)
+
+
+class Result(object):
+    """The outcome of a single item of a batch call.
+
+    :param index: The position of the item in the batch input.
+    :param item: The input item.
+    :param value: The value returned for the item, if it succeeded.
+    :param exception: The exception raised for the item, if it failed.
+    """
+
+    __slots__ = ('index', 'item', 'value', 'exception')
+
+    def __init__(self, index, item, value=None, exception=None):
+        self.index = index
+        self.item = item
+        self.value = value
+        self.exception = exception
+
+    @property
+    def ok(self):
+        return self.exception is None
+
+    def get(self):
+        """Return the value of the item or raise its exception."""
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+    def __repr__(self):
+        if self.ok:
+            return '<Result #%d ok>' % self.index
+        return '<Result #%d %s>' % (self.index,
+                                    self.exception.__class__.__name__)
+
+
+def fan_out(func, items, max_workers=10, ordered=True):
+    """Call `func` on every item using a bounded pool of threads.
+
+    All the items are submitted before this function returns, the
+    results are then consumed from the returned iterator.
+
+    :param func: A callable taking a single item.
+    :param items: An iterable of items.
+    :param max_workers: The maximum number of concurrent calls.
+    :param ordered: If True, results are yielded in the input order,
+                    otherwise as soon as they complete.
+    :returns: An iterator of :class:`Result`.
+    """
+    items = list(items)
+    if not items:
+        return iter(())
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(items))))
+    try:
+        futures = [executor.submit(func, item) for item in items]
+    finally:
+        # Running calls keep the threads alive until they are done.
+        executor.shutdown(wait=False)
+    return _iter_results(futures, items, ordered)
+
+
+def _iter_results(futures, items, ordered):
+    indexes = {future: i for i, future in enumerate(futures)}
+    if ordered:
+        pending = futures
+    else:
+        pending = concurrent.futures.as_completed(futures)
+    for future in pending:
+        index = indexes[future]
+        try:
+            value = future.result()
+        except Exception as e:
+            LOG.debug("Batch item #%d failed: %s" % (index, e))
+            yield Result(index, items[index], exception=e)
+        else:
+            yield Result(index, items[index], value=value)
+
+
+def imap_unordered(func, items, max_workers=10, window=None):
+    """Like :func:`fan_out`, but consume the items lazily.
+
+    At most `window` items are read ahead of the completed ones, so an
+    iterator of any length, e.g. the lines of a file, is processed in
+    bounded memory. Results are yielded as soon as they complete.
+
+    :param func: A callable taking a single item.
+    :param items: An iterable of items.
+    :param max_workers: The maximum number of concurrent calls.
+    :param window: (optional) The maximum number of pending items,
+                   defaults to twice max_workers.
+    :returns: An iterator of :class:`Result`.
+    """
+    max_workers = max(1, max_workers)
+    window = max(window or 2 * max_workers, max_workers)
+    items = iter(items)
+    pending = {}
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers) as executor:
+        index = 0
+        for item in items:
+            pending[executor.submit(func, item)] = (index, item)
+            index += 1
+            if len(pending) < window:
+                continue
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for result in _pop_results(pending, done):
+                yield result
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for result in _pop_results(pending, done):
+                yield result
+
+
+def _pop_results(pending, done):
+    for future in done:
+        index, item = pending.pop(future)
+        try:
+            value = future.result()
+        except Exception as e:
+            LOG.debug("Batch item #%d failed: %s" % (index, e))
+            yield Result(index, item, exception=e)
+        else:
+            yield Result(index, item, value=value)
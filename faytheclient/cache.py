@@ -0,0 +1,158 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import collections
+import threading
+import time
+
+# Listings depending on a resource, they are dropped from the cache
+# when the resource is modified.
+DEPENDENT_RESOURCES = {
+    'clouds': ('clouds', 'scalers', 'healers', 'silences'),
+    'policies': ('policies', 'users'),
+}
+# The resources whose modifications make listings stale, the other
+# ones, e.g. a login on /tokens, leave the cache untouched.
+LISTED_RESOURCES = frozenset(['clouds', 'scalers', 'healers', 'silences',
+                              'users', 'policies', 'nsresolvers'])
+
+
+def dependent_paths(url):
+    """Return the listing paths a modification of url makes stale."""
+    resource = url.lstrip('/').split('/', 1)[0].split('?', 1)[0]
+    if resource not in LISTED_RESOURCES:
+        return ()
+    return tuple('/' + r for r in
+                 DEPENDENT_RESOURCES.get(resource, (resource,)))
+
+
+class Entry(object):
+    __slots__ = ('value', 'expires_at', 'etag', 'last_modified')
+
+    def __init__(self, value, expires_at, etag=None, last_modified=None):
+        self.value = value
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def fresh(self):
+        return time.time() < self.expires_at
+
+
+class ResponseCache(object):
+    """A bounded LRU cache of decoded responses with a TTL.
+
+    Expired entries holding an ETag or a Last-Modified header are kept
+    until they are evicted, so they can be revalidated with a
+    conditional request instead of being downloaded again.
+
+    The cached values are shared by all the callers, they must not be
+    modified.
+
+    :param maxsize: The maximum number of cached responses.
+    :param ttl: The number of seconds a response is served without
+                asking the server.
+    """
+
+    def __init__(self, maxsize=256, ttl=5):
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl)
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.invalidations = 0
+        # Bumped by every invalidation, a response fetched before it
+        # may be outdated and is not stored.
+        self.generation = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key):
+        """Return the entry of a key, fresh or not, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if entry.fresh:
+                self.hits += 1
+            elif entry.etag is None and entry.last_modified is None:
+                # Nothing to revalidate it with.
+                del self._entries[key]
+                self.misses += 1
+                return None
+            return entry
+
+    def store(self, key, value, etag=None, last_modified=None,
+              generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = Entry(value, time.time() + self.ttl,
+                                       etag, last_modified)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def revalidate(self, key, entry):
+        """Mark an entry confirmed by a 304 response as fresh again."""
+        with self._lock:
+            self.revalidations += 1
+            entry.expires_at = time.time() + self.ttl
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def record_miss(self):
+        """Count a revalidation the server answered with a new body."""
+        with self._lock:
+            self.misses += 1
+
+    def invalidate(self, url):
+        """Drop the cached listings depending on a modified url."""
+        prefixes = dependent_paths(url)
+        if not prefixes:
+            return
+        with self._lock:
+            self.generation += 1
+            for key in list(self._entries):
+                path = key[1].split('?', 1)[0]
+                if any(path == p or path.startswith(p + '/')
+                       for p in prefixes):
+                    del self._entries[key]
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'invalidations': self.invalidations,
+        }
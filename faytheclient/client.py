@@ -18,14 +18,19 @@
 # specific language governing permissions and limitations
 # under the License.
 
-import json
+import functools
 import logging
-import time
 
 import requests
 
+from faytheclient import auth
+from faytheclient import batch
 from faytheclient import http
+from faytheclient import metrics
+from faytheclient import models
+from faytheclient import reconcile
 from faytheclient import utils
+from faytheclient import writebehind
 
 LOG = logging.getLogger(__name__)
 
@@ -36,27 +41,132 @@ class Client(http.HTTPClient):
     :param endpoint: A user-supplied endpoint URL for the Faythe service.
     :param username: A username to generate jwt.
     :param password: A Faythe password to generate jwt.
+    :param models: (optional) If True, the listing methods return
+                   :mod:`faytheclient.models` objects instead of the
+                   decoded JSON responses.
     """
 
-    jwt_expired_at = None
-    headers = None
-
     def __init__(self, endpoint, username, password, **kwargs):
-        """Initialize a new client for the Faythe API."""
+        """Initialize a new client for the Faythe API.
+
+        :param token_leeway: (optional) Number of seconds before the jwt
+                             expiry at which it is refreshed.
+        :param token_refresh_in_background: (optional) Refresh the jwt
+                                            from a timer thread instead
+                                            of the calling thread. Call
+                                            close() to stop it.
+        :param replica_tokens: (optional) With several endpoints, log in
+                               to every replica and use its own jwt
+                               instead of sharing one.
+        :param shared_store: (optional) A
+                             :class:`faytheclient.shared.SharedStore`,
+                             or the path of its file. The clients of
+                             the same user in other processes then log
+                             in once and, with cache=True, share the
+                             cached responses.
+        :param write_behind: (optional) True or a
+                             :class:`faytheclient.writebehind.WriteBehindQueue`
+                             to queue the mutations of the
+                             :attr:`write_behind` methods, see
+                             :mod:`faytheclient.writebehind`.
+        :param write_behind_delay: (optional) The maximum number of
+                                   seconds a mutation is queued, when
+                                   write_behind is True.
+        :param write_behind_workers: (optional) The maximum number of
+                                     concurrent queued mutations sent,
+                                     defaults to max_workers.
+        """
+        # The jwt and the responses are only shared with the same user.
+        kwargs.setdefault('shared_namespace', username)
         super(Client, self).__init__(endpoint, **kwargs)
         self.username = username
         self.password = password
+        # Number of concurrent requests used by the batch methods.
+        self.max_workers = int(kwargs.get('max_workers', 10))
+        self.models = bool(kwargs.get('models', False))
+        self.write_behind = kwargs.get('write_behind')
+        if self.write_behind is True:
+            self.write_behind = writebehind.WriteBehindQueue(
+                max_delay=kwargs.get('write_behind_delay', 0.1),
+                max_workers=kwargs.get('write_behind_workers',
+                                       self.max_workers))
+        if isinstance(self.write_behind, writebehind.WriteBehindQueue):
+            self.write_behind = writebehind.WriteBehind(self,
+                                                        self.write_behind)
+        else:
+            self.write_behind = None
+        self.token_manager = auth.TokenManager(
+            self._login,
+            leeway=kwargs.get('token_leeway', 60),
+            background=kwargs.get('token_refresh_in_background', False),
+            store=self.shared_store, store_key=self.shared_namespace)
+        self.replica_tokens = bool(kwargs.get('replica_tokens') and
+                                   self.balancer is not None)
+        if self.replica_tokens:
+            for replica in self.balancer.replicas:
+                # Logged in lazily, on the first request to the replica.
+                replica.token_manager = auth.TokenManager(
+                    functools.partial(self._login, replica),
+                    leeway=kwargs.get('token_leeway', 60),
+                    store=self.shared_store,
+                    store_key='%s|%s' % (replica.endpoint, username))
 
         self.get_jwt_token()
-        self.jwt_expired_at = time.time() + 60 * 40  # 40 minutes
+
+    @property
+    def headers(self):
+        return self.token_manager.headers
+
+    @property
+    def jwt_expired_at(self):
+        return self.token_manager.expires_at
+
+    def close(self):
+        if getattr(self, 'write_behind', None) is not None:
+            # The queued mutations are sent before the session closes.
+            self.write_behind.close()
+        if getattr(self, 'token_manager', None) is not None:
+            self.token_manager.close()
+        for replica in getattr(getattr(self, 'balancer', None), 'replicas',
+                               ()):
+            if replica.token_manager is not None:
+                replica.token_manager.close()
+        super(Client, self).close()
+
+    def _load(self, model, data):
+        if not self.models:
+            return data
+        return models.load(model, data, many=True)
+
+    def _iter_load(self, model, items):
+        if not self.models:
+            return items
+        return models.iter_load(model, items)
 
     def get_jwt_token(self):
-        """Get and store jwt in its Session's cookies"""
+        """Get a new jwt and store it in the client's headers"""
+        return self.token_manager.refresh()
+
+    def _login(self, replica=None):
+        if self.metrics is not None:
+            self.metrics.record_token_refresh()
+        elif self.limiter is None:
+            return self._fetch_jwt_token(replica)
+        with metrics.operation('login'):
+            return self._fetch_jwt_token(replica)
+
+    def _fetch_jwt_token(self, replica=None):
+        kwargs = {}
+        if replica is not None:
+            # Sent from within a request, outside of the rate limiter.
+            kwargs['replica'] = replica
+            kwargs['limited'] = False
         try:
             resp = self.post('/tokens',
-                             auth=(self.username, self.password))
-            self.headers = {"Authorization": resp.headers['Authorization']}
-            LOG.debug("Logged into Faythe %s" % self.endpoint)
+                             auth=(self.username, self.password), **kwargs)
+            LOG.debug("Logged into Faythe %s" %
+                      (replica.endpoint if replica else self.endpoint))
+            return resp.headers['Authorization']
         except Exception as e:
             LOG.exception("Unable to authenticate a user: {}".format(e))
             raise e
@@ -64,10 +174,30 @@ class Client(http.HTTPClient):
     class decorator(object):
         @staticmethod
         def refresh_jwt_token(decorated_func):
+            operation = decorated_func.__name__
+
+            @functools.wraps(decorated_func)
             def wrapper(api, *args, **kwargs):
-                if time.time() > api.jwt_expired_at:
-                    api.get_jwt_token()
-                return decorated_func(api, *args, **kwargs)
+                if api.metrics is None and api.limiter is None:
+                    return call(api, *args, **kwargs)
+                with metrics.operation(operation):
+                    return call(api, *args, **kwargs)
+
+            def call(api, *args, **kwargs):
+                token = api.token_manager.get()
+                try:
+                    return decorated_func(api, *args, **kwargs)
+                except requests.exceptions.HTTPError as e:
+                    # The jwt may have been revoked or the server clock
+                    # may differ, log in again and retry once.
+                    if e.response is None or e.response.status_code != 401:
+                        raise
+                    if not api.replica_tokens:
+                        # The rejected replica jwt is invalidated by
+                        # the HTTPClient.
+                        api.token_manager.invalidate(token)
+                        api.token_manager.get()
+                    return decorated_func(api, *args, **kwargs)
 
             return wrapper
 
@@ -85,7 +215,20 @@ class Client(http.HTTPClient):
                          Clouds that match any tags in this list will be returned.
         """
         url = utils.generate_url('/clouds', **kwargs)
-        return self.get(url, headers=self.headers).json()
+        return self._load(models.Cloud,
+                          self.get_json(url, headers=self.headers))
+
+    @decorator.refresh_jwt_token
+    def iter_clouds(self, **kwargs):
+        """Iterate over the clouds that are registerd to Faythe
+
+        Unlike :meth:`list_clouds`, the response is parsed while it is
+        downloaded and a single cloud is held in memory at a time.
+        It accepts the same filters as :meth:`list_clouds`.
+        """
+        url = utils.generate_url('/clouds', **kwargs)
+        return self._iter_load(models.Cloud,
+                               self.iter_json(url, headers=self.headers))
 
     @decorator.refresh_jwt_token
     def register_cloud(self, provider, body):
@@ -96,7 +239,8 @@ class Client(http.HTTPClient):
         :param body: A dictionary object.
         """
         url = utils.generate_url('/clouds', provider)
-        return self.post(url, body=body, headers=self.headers).json()
+        resp = self.post(url, body=body, headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def unregister_cloud(self, id):
@@ -105,7 +249,8 @@ class Client(http.HTTPClient):
         :param id: The id of cloud.
         """
         url = utils.generate_url('/clouds', id)
-        return self.delete(url. format(id), headers=self.headers).json()
+        resp = self.delete(url. format(id), headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def update_cloud(self, id, body=None):
@@ -116,7 +261,8 @@ class Client(http.HTTPClient):
                      is None, the cloud won't be updated.
         """
         url = utils.generate_url('/clouds', id)
-        return self.put(url, body=body, headers=self.headers).json()
+        resp = self.put(url, body=body, headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def create_scaler(self, cloud_id, body):
@@ -126,7 +272,8 @@ class Client(http.HTTPClient):
         :param body: A dictionary object.
         """
         url = utils.generate_url('/scalers', cloud_id)
-        return self.post(url, body=body, headers=self.headers).json()
+        resp = self.post(url, body=body, headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def list_scalers(self, cloud_id, **kwargs):
@@ -139,13 +286,27 @@ class Client(http.HTTPClient):
                          Scalers that match any tags in this list will be returned.
         """
         url = utils.generate_url('/scalers', cloud_id, **kwargs)
-        return self.get(url, headers=self.headers).json()
+        return self._load(models.Scaler,
+                          self.get_json(url, headers=self.headers))
+
+    @decorator.refresh_jwt_token
+    def iter_scalers(self, cloud_id, **kwargs):
+        """Iterate over the scalers belong to a cloud.
+
+        Unlike :meth:`list_scalers`, the response is parsed while it is
+        downloaded and a single scaler is held in memory at a time.
+        It accepts the same filters as :meth:`list_scalers`.
+        """
+        url = utils.generate_url('/scalers', cloud_id, **kwargs)
+        return self._iter_load(models.Scaler,
+                               self.iter_json(url, headers=self.headers))
 
     @decorator.refresh_jwt_token
     def delete_scaler(self, cloud_id):
         """Delete a scaler."""
         url = utils.generate_url('/scalers', cloud_id)
-        return self.delete(url, headers=self.headers).json()
+        resp = self.delete(url, headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def update_scaler(self, cloud_id, body=None):
@@ -156,12 +317,14 @@ class Client(http.HTTPClient):
                      is None, the scaler won't be updated.
         """
         url = utils.generate_url('/scalers', cloud_id)
-        return self.put(url, body=body, headers=self.headers).json()
+        resp = self.put(url, body=body, headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def list_nresolvers(self):
         """List all nresovlers (name resolvers)."""
-        return self.get('/nsresolvers', headers=self.headers).json()
+        return self._load(models.NResolver,
+                          self.get_json('/nsresolvers', headers=self.headers))
 
     @decorator.refresh_jwt_token
     def list_healers(self, cloud_id):
@@ -169,7 +332,8 @@ class Client(http.HTTPClient):
 
         :param cloud_id: The id of cloud.
         """
-        return self.get('/healers', headers=self.headers).json()
+        return self._load(models.Healer,
+                          self.get_json('/healers', headers=self.headers))
 
     @decorator.refresh_jwt_token
     def create_healer(self, cloud_id, body):
@@ -179,7 +343,8 @@ class Client(http.HTTPClient):
         :param body: A dictionary object.
         """
         url = utils.generate_url('/healers', cloud_id)
-        return self.post(url, body=body, headers=self.headers).json()
+        resp = self.post(url, body=body, headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def delete_healers(self, cloud_id):
@@ -188,7 +353,8 @@ class Client(http.HTTPClient):
         :param cloud_id: The id of cloud.
         """
         url = utils.generate_url('/healers', cloud_id)
-        return self.delete(url . format(cloud_id), headers=self.headers).json()
+        resp = self.delete(url . format(cloud_id), headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def create_silence(self, cloud_id, body):
@@ -198,7 +364,8 @@ class Client(http.HTTPClient):
         :param body: A dictionary object.
         """
         url = utils.generate_url('/silences', cloud_id)
-        return self.post(url,  body=body, headers=self.headers).json()
+        resp = self.post(url,  body=body, headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def list_silences(self, cloud_id):
@@ -207,7 +374,18 @@ class Client(http.HTTPClient):
         :param cloud_id: The id of cloud.
         """
         url = utils.generate_url('/silences', cloud_id)
-        return self.get(url, headers=self.headers).json()
+        return self._load(models.Silence,
+                          self.get_json(url, headers=self.headers))
+
+    @decorator.refresh_jwt_token
+    def iter_silences(self, cloud_id):
+        """Iterate over the silencers belong to a cloud.
+
+        :param cloud_id: The id of cloud.
+        """
+        url = utils.generate_url('/silences', cloud_id)
+        return self._iter_load(models.Silence,
+                               self.iter_json(url, headers=self.headers))
 
     @decorator.refresh_jwt_token
     def delete_silence(self, cloud_id):
@@ -216,13 +394,15 @@ class Client(http.HTTPClient):
         :param cloud_id: The id of cloud.
         """
         url = utils.generate_url('/silences', cloud_id)
-        return self.delete(url, headers=self.headers).json()
+        resp = self.delete(url, headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def list_users(self):
         """List all Faythe users with policies."""
         url = utils.generate_url('/users')
-        return self.get(url, headers=self.headers).json()
+        return self._load(models.User,
+                          self.get_json(url, headers=self.headers))
 
     @decorator.refresh_jwt_token
     def create_user(self, user):
@@ -232,7 +412,8 @@ class Client(http.HTTPClient):
                      for example: {'username': 'new', 'password': 'secret'}
         """
         url = utils.generate_url('/users')
-        return self.post(url, headers=self.headers, data=user).json()
+        resp = self.post(url, headers=self.headers, data=user)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def delete_user(self, username):
@@ -241,7 +422,8 @@ class Client(http.HTTPClient):
         :param username: The name of user.
         """
         url = utils.generate_url('/users', username)
-        return self.delete(url, headers=self.headers).json()
+        resp = self.delete(url, headers=self.headers)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def change_password(self, username, newpassword):
@@ -262,7 +444,8 @@ class Client(http.HTTPClient):
         :param body: A list of dictionary object.
         """
         url = utils.generate_url('/policies', username)
-        return self.post(url, headers=self.headers, body=body).json()
+        resp = self.post(url, headers=self.headers, body=body)
+        return self.decode(resp)
 
     @decorator.refresh_jwt_token
     def remove_policies(self, username, body):
@@ -272,4 +455,110 @@ class Client(http.HTTPClient):
         :param body: A list of dictionary object.
         """
         url = utils.generate_url('/policies', username)
-        return self.delete(url, headers=self.headers, body=body).json()
+        resp = self.delete(url, headers=self.headers, body=body)
+        return self.decode(resp)
+
+    def _fan_out(self, method, items, max_workers=None, ordered=True):
+        # The batch methods refresh the jwt before the fan out, the token
+        # manager then serves every item without logging in again.
+        return batch.fan_out(lambda args: method(*args), items,
+                             max_workers=max_workers or self.max_workers,
+                             ordered=ordered)
+
+    @decorator.refresh_jwt_token
+    def register_clouds(self, items, max_workers=None, ordered=True):
+        """Register many clouds concurrently.
+
+        :param items: An iterable of (provider, body) tuples.
+        :param max_workers: (optional) The maximum number of concurrent
+                            requests, defaults to the client max_workers.
+        :param ordered: (optional) If False, results are returned as soon
+                        as they complete instead of the input order.
+        :returns: An iterator of :class:`faytheclient.batch.Result`.
+        """
+        return self._fan_out(self.register_cloud, items,
+                             max_workers, ordered)
+
+    @decorator.refresh_jwt_token
+    def unregister_clouds(self, ids, max_workers=None, ordered=True):
+        """Remove many clouds concurrently.
+
+        :param ids: An iterable of cloud ids.
+        See :meth:`register_clouds` for the other parameters.
+        """
+        return self._fan_out(self.unregister_cloud, ((id,) for id in ids),
+                             max_workers, ordered)
+
+    @decorator.refresh_jwt_token
+    def create_scalers(self, cloud_id, bodies, max_workers=None,
+                       ordered=True):
+        """Create many scalers belong to a cloud concurrently.
+
+        :param cloud_id: The id of cloud.
+        :param bodies: An iterable of dictionary objects.
+        See :meth:`register_clouds` for the other parameters.
+        """
+        return self._fan_out(self.create_scaler,
+                             ((cloud_id, body) for body in bodies),
+                             max_workers, ordered)
+
+    @decorator.refresh_jwt_token
+    def delete_scalers(self, cloud_ids, max_workers=None, ordered=True):
+        """Delete many scalers concurrently.
+
+        See :meth:`register_clouds` for the other parameters.
+        """
+        return self._fan_out(self.delete_scaler,
+                             ((cloud_id,) for cloud_id in cloud_ids),
+                             max_workers, ordered)
+
+    @decorator.refresh_jwt_token
+    def create_healers(self, cloud_id, bodies, max_workers=None,
+                       ordered=True):
+        """Create many healers belong to a cloud concurrently.
+
+        :param cloud_id: The id of cloud.
+        :param bodies: An iterable of dictionary objects.
+        See :meth:`register_clouds` for the other parameters.
+        """
+        return self._fan_out(self.create_healer,
+                             ((cloud_id, body) for body in bodies),
+                             max_workers, ordered)
+
+    @decorator.refresh_jwt_token
+    def create_silences(self, cloud_id, bodies, max_workers=None,
+                        ordered=True):
+        """Create many silencers belong to a cloud concurrently.
+
+        :param cloud_id: The id of cloud.
+        :param bodies: An iterable of dictionary objects.
+        See :meth:`register_clouds` for the other parameters.
+        """
+        return self._fan_out(self.create_silence,
+                             ((cloud_id, body) for body in bodies),
+                             max_workers, ordered)
+
+    @decorator.refresh_jwt_token
+    def delete_silences(self, cloud_ids, max_workers=None, ordered=True):
+        """Delete many silencers concurrently.
+
+        See :meth:`register_clouds` for the other parameters.
+        """
+        return self._fan_out(self.delete_silence,
+                             ((cloud_id,) for cloud_id in cloud_ids),
+                             max_workers, ordered)
+
+    def reconcile(self, desired, dry_run=False, prune=True):
+        """Synchronize the scalers, healers and silences of many clouds.
+
+        Only the objects differing from the desired state are sent, see
+        :mod:`faytheclient.reconcile` for the document format.
+
+        :param desired: The desired state document.
+        :param dry_run: (optional) If True, only compute the plan.
+        :param prune: (optional) If True, delete the objects missing
+                      from the desired state.
+        :returns: A (:class:`faytheclient.reconcile.Plan`, results) tuple.
+        """
+        return reconcile.Reconciler(self, prune=prune).sync(desired,
+                                                             dry_run)
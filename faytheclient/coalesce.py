@@ -0,0 +1,122 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Coalesce identical concurrent requests into a single one.
+
+While a call for a key is in flight, the other calls for the same key
+wait for it and get its result, or its exception, instead of sending
+their own request. The results are shared by all the callers, they
+must not be modified.
+"""
+
+import threading
+
+
+def request_key(method, url, headers=None):
+    """Return the key of a request, its credentials included.
+
+    Requests sent with different jwts are never coalesced, the server
+    may answer them differently.
+    """
+    return (method, url, (headers or {}).get('Authorization'))
+
+
+class _Call(object):
+    __slots__ = ('event', 'value', 'exception')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.exception = None
+
+
+class SingleFlight(object):
+    """Coalesce the concurrent calls of threads."""
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """Call func, unless a call for the same key is in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                leader = True
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                leader = False
+                self.coalesced += 1
+        if not leader:
+            call.event.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.value
+        try:
+            call.value = func(*args, **kwargs)
+        except BaseException as e:
+            call.exception = e
+            raise
+        finally:
+            # Later calls send a new request, the result is not cached.
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.value
+
+    def stats(self):
+        return {'calls': self.calls, 'coalesced': self.coalesced,
+                'inflight': len(self._calls)}
+
+
+class AsyncSingleFlight(object):
+    """Coalesce the concurrent calls of coroutines.
+
+    The call runs in its own task, a caller being cancelled doesn't
+    cancel it for the others.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._tasks = {}
+
+    async def do(self, key, func, *args, **kwargs):
+        """Await func(), unless a call for the same key is in flight."""
+        # Imported here, the threaded clients don't load asyncio.
+        import asyncio
+
+        task = self._tasks.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(
+                lambda _: self._tasks.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {'calls': self.calls, 'coalesced': self.coalesced,
+                'inflight': len(self._tasks)}
@@ -0,0 +1,115 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""JSON codecs used to encode request and decode response bodies.
+
+The fastest installed backend is picked by default, in the order of
+:data:`AUTO_BACKENDS`, the standard library json module is always there.
+simplejson is not picked automatically, it isn't faster than the
+standard library on recent Pythons.
+"""
+
+import importlib
+import json
+
+BACKENDS = ('orjson', 'ujson', 'simplejson', 'json')
+AUTO_BACKENDS = ('orjson', 'ujson', 'json')
+
+
+class Codec(object):
+    """A JSON backend.
+
+    :param name: The name of the backend module.
+    :param dumps: A callable encoding an object to bytes.
+    :param loads: A callable decoding bytes or str to an object. It
+                  raises a ValueError subclass on invalid input.
+    """
+
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return '<Codec %s>' % self.name
+
+
+def _orjson(module):
+    return Codec('orjson', module.dumps, module.loads)
+
+
+def _ujson(module):
+    def dumps(obj):
+        return module.dumps(obj, ensure_ascii=False).encode('utf-8')
+    return Codec('ujson', dumps, module.loads)
+
+
+def _simplejson(module):
+    def dumps(obj):
+        return module.dumps(obj, separators=(',', ':'),
+                            ensure_ascii=False).encode('utf-8')
+    return Codec('simplejson', dumps, module.loads)
+
+
+def _json(module):
+    def dumps(obj):
+        return module.dumps(obj, separators=(',', ':'),
+                            ensure_ascii=False).encode('utf-8')
+    return Codec('json', dumps, module.loads)
+
+
+_FACTORIES = {
+    'orjson': _orjson,
+    'ujson': _ujson,
+    'simplejson': _simplejson,
+    'json': _json,
+}
+_codecs = {}
+
+
+def get_codec(name='auto'):
+    """Return a codec by backend name.
+
+    :param name: One of :data:`BACKENDS`, 'auto' for the fastest
+                 installed one or a Codec instance.
+    :raises ImportError: If the requested backend isn't installed.
+    """
+    if isinstance(name, Codec):
+        return name
+    if name in _codecs:
+        return _codecs[name]
+    if name == 'auto':
+        for backend in AUTO_BACKENDS:
+            try:
+                codec = get_codec(backend)
+            except ImportError:
+                continue
+            _codecs[name] = codec
+            return codec
+    if name not in _FACTORIES:
+        raise ValueError("Unknown JSON codec %r, expecting one of %s" %
+                         (name, ', '.join(BACKENDS)))
+    if name == 'json':
+        module = json
+    else:
+        module = importlib.import_module(name)
+    codec = _FACTORIES[name](module)
+    _codecs[name] = codec
+    return codec
@@ -0,0 +1,122 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Compression of the request bodies.
+
+The responses are decoded by urllib3 and aiohttp: gzip and deflate,
+brotli when the brotli package is installed and zstd when the
+zstandard one is. The clients advertise the encodings they decode.
+
+The request bodies are only compressed when asked, the server must
+accept a Content-Encoding on the requests.
+"""
+
+import zlib
+
+# The level of the gzip and deflate compression, the higher ones are
+# much slower for a small gain on JSON.
+LEVEL = 6
+
+
+def _gzip(data):
+    # gzip.compress writes a timestamp, a raw zlib stream with a gzip
+    # header is the same without one.
+    compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _deflate(data):
+    return zlib.compress(data, LEVEL)
+
+
+def _brotli(data):
+    import brotli
+    return brotli.compress(data, quality=5)
+
+
+def _zstd(data):
+    import zstandard
+    return zstandard.ZstdCompressor(level=3).compress(data)
+
+
+COMPRESSORS = {
+    'gzip': _gzip,
+    'deflate': _deflate,
+    'br': _brotli,
+    'zstd': _zstd,
+}
+# The modules the encodings need.
+MODULES = {'br': 'brotli', 'zstd': 'zstandard'}
+
+
+def accept_encoding():
+    """Return the Accept-Encoding header of the encodings urllib3
+    decodes.
+    """
+    from urllib3.util import request as urllib3_request
+    return ', '.join(e.strip() for e in
+                     urllib3_request.ACCEPT_ENCODING.split(','))
+
+
+def get_compressor(encoding):
+    """Return the function compressing a body with an encoding.
+
+    :raises ValueError: If the encoding is unknown or its module isn't
+                        installed.
+    """
+    compressor = COMPRESSORS.get(encoding)
+    if compressor is None:
+        raise ValueError("Unknown content encoding %r, expecting one of %s"
+                         % (encoding, ', '.join(sorted(COMPRESSORS))))
+    module = MODULES.get(encoding)
+    if module is not None:
+        try:
+            __import__(module)
+        except ImportError:
+            raise ValueError("The %s content encoding requires the %s "
+                             "package" % (encoding, module))
+    return compressor
+
+
+class RequestCompressor(object):
+    """Compress the request bodies above a size.
+
+    :param min_size: The size in bytes from which a body is compressed.
+    :param encoding: The content encoding, see :data:`COMPRESSORS`.
+    """
+
+    def __init__(self, min_size=1024, encoding='gzip'):
+        self.min_size = int(min_size)
+        self.encoding = encoding
+        self._compress = get_compressor(encoding)
+
+    def compress(self, data, headers):
+        """Return the body to send, compressed if it is large enough.
+
+        The Content-Encoding header is set when it is.
+        """
+        if len(data) < self.min_size or 'Content-Encoding' in headers:
+            return data
+        compressed = self._compress(data)
+        if len(compressed) >= len(data):
+            # Not worth the server decompressing it.
+            return data
+        headers['Content-Encoding'] = self.encoding
+        return compressed
@@ -18,11 +18,6 @@
 # specific language governing permissions and limitations
 # under the License.
 
-import re
-import sys
-
-import six
-
 
 class BaseException(Exception):
     """An error occurred."""
@@ -42,6 +37,14 @@ class CommunicationError(BaseException):
     """Unable to communicate with server."""
 
 
+class CircuitOpen(CommunicationError):
+    """The endpoint is failing, the request was not sent."""
+
+
+class DeadlineExceeded(CommunicationError):
+    """The request did not complete before its deadline."""
+
+
 class HTTPException(Exception):
     """Base exception for all HTTP-derived exceptions."""
     code = 'N/A'
@@ -18,31 +18,380 @@
 # specific language governing permissions and limitations
 # under the License.
 
-import copy
-import json
 import logging
 import socket
+import threading
+import time
 
 import requests
-import simplejson
+from requests import adapters
+from urllib3 import connection
+from urllib3.util import retry
 
+from faytheclient import balancer as replica_balancer
+from faytheclient import cache as response_cache
+from faytheclient import codec as json_codec
+from faytheclient import coalesce
+from faytheclient import compression
 from faytheclient import exceptions
+from faytheclient import limiter as rate_limiter
+from faytheclient import metrics as request_metrics
+from faytheclient import retry as retry_policy
+from faytheclient import stream
 
 USER_AGENT = 'faytheclient'
 LOG = logging.getLogger(__name__)
 
+# Methods retried by the transport, replaying them has no side effect.
+IDEMPOTENT_METHODS = retry_policy.IDEMPOTENT_METHODS
+POOL_OPTIONS = ('pool_connections', 'pool_maxsize', 'pool_block',
+                'max_retries', 'backoff_factor', 'keepalive', 'ssl_context',
+                'transport')
+
+# The keyword arguments the prepared request templates handle, the
+# other ones, e.g. auth, are sent through Session.request.
+TEMPLATE_KWARGS = frozenset(['data', 'stream'])
+
+_shared_sessions = {}
+_shared_sessions_lock = threading.Lock()
+
+
+def _keepalive_socket_options():
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # Probe idle connections after 60s instead of the 2 hours default,
+    # so pooled connections dropped by a firewall are detected.
+    for name, value in (('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 10),
+                        ('TCP_KEEPCNT', 6)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+class PoolAdapter(adapters.HTTPAdapter):
+    """An HTTPAdapter with TCP keep-alive and a shared TLS context.
+
+    :param keepalive: Enable TCP keep-alive on pooled connections.
+    :param ssl_context: (optional) A ssl.SSLContext shared by all the
+                        connections, so certificates are loaded once.
+    """
+
+    def __init__(self, keepalive=True, ssl_context=None, **kwargs):
+        # The pool manager is created by the parent constructor.
+        self.keepalive = keepalive
+        self.ssl_context = ssl_context
+        super(PoolAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keepalive:
+            kwargs['socket_options'] = \
+                connection.HTTPConnection.default_socket_options + \
+                _keepalive_socket_options()
+        if self.ssl_context is not None:
+            kwargs['ssl_context'] = self.ssl_context
+        super(PoolAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+def _idempotent_retry(total, backoff_factor):
+    kwargs = dict(total=total, connect=total, read=total, status=total,
+                  backoff_factor=backoff_factor,
+                  status_forcelist=(502, 503, 504), raise_on_status=False)
+    try:
+        return retry.Retry(allowed_methods=IDEMPOTENT_METHODS, **kwargs)
+    except TypeError:
+        # urllib3 < 1.26
+        return retry.Retry(method_whitelist=IDEMPOTENT_METHODS, **kwargs)
+
+
+def create_session(pool_connections=10, pool_maxsize=10, pool_block=False,
+                   max_retries=0, backoff_factor=0, keepalive=True,
+                   ssl_context=None, transport='http1'):
+    """Create a requests Session with a tuned connection pool.
+
+    :param pool_connections: The number of hosts to keep pools for.
+    :param pool_maxsize: The maximum number of connections per host.
+    :param pool_block: If True, wait for a free connection instead of
+                       opening one that is discarded after use.
+    :param max_retries: The number of retries of idempotent requests
+                        failing to connect or with a 502/503/504.
+    :param backoff_factor: The exponential backoff between retries.
+    :param keepalive: Enable TCP keep-alive on pooled connections.
+    :param ssl_context: (optional) A ssl.SSLContext shared by all the
+                        connections.
+    :param transport: 'http1', 'http2' or 'h2c' to multiplex the
+                      requests over HTTP/2, see
+                      :mod:`faytheclient.http2`, or a requests
+                      transport adapter. max_retries and
+                      backoff_factor only apply to 'http1'.
+    """
+    if isinstance(transport, adapters.BaseAdapter):
+        adapter = transport
+    elif transport in ('http2', 'h2c'):
+        # Imported on demand, httpx is an optional dependency.
+        from faytheclient import http2
+        adapter = http2.HTTP2Adapter(pool_maxsize=pool_maxsize,
+                                     keepalive=keepalive,
+                                     ssl_context=ssl_context,
+                                     prior_knowledge=transport == 'h2c')
+    elif transport == 'http1':
+        if max_retries:
+            max_retries = _idempotent_retry(int(max_retries),
+                                            float(backoff_factor))
+        adapter = PoolAdapter(keepalive=keepalive, ssl_context=ssl_context,
+                              pool_connections=int(pool_connections),
+                              pool_maxsize=int(pool_maxsize),
+                              pool_block=pool_block, max_retries=max_retries)
+    else:
+        raise ValueError("Unknown transport %r, expecting http1, http2 "
+                         "or h2c" % (transport,))
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    # Every encoding urllib3 decodes, brotli and zstd included when
+    # their packages are installed.
+    session.headers["Accept-Encoding"] = compression.accept_encoding()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _normalize_endpoint(endpoint):
+    normalized = endpoint.strip('/')
+    if not endpoint.startswith('http') and not endpoint.startswith('https'):
+        normalized = 'http://{}'.format(endpoint)
+    return normalized
+
+
+def _copy_prepared(template):
+    # PreparedRequest.copy also copies the cookie jar, it is empty and
+    # Session.send copies the request before following a redirect.
+    prepared = requests.PreparedRequest()
+    prepared.method = template.method
+    prepared.url = template.url
+    prepared.headers = template.headers.copy()
+    prepared._cookies = template._cookies
+    prepared.body = template.body
+    prepared.hooks = template.hooks
+    return prepared
+
+
+def _session_state(session):
+    """Return the session settings the prepared request templates hold,
+    compared on every request to drop the templates when they change.
+    """
+    return (tuple(session.headers.items()), session.auth,
+            tuple(session.params.items()) if isinstance(session.params, dict)
+            else session.params,
+            tuple(session.proxies.items()), session.verify, session.cert,
+            session.trust_env,
+            tuple((event, tuple(hooks))
+                  for event, hooks in session.hooks.items()))
+
+
+def get_shared_session(endpoint, **kwargs):
+    """Return the session shared by all the clients of an endpoint.
+
+    The pool options are only used by the first call for an endpoint.
+    """
+    with _shared_sessions_lock:
+        session = _shared_sessions.get(endpoint)
+        if session is None:
+            session = create_session(**kwargs)
+            _shared_sessions[endpoint] = session
+        return session
+
 
 class HTTPClient(object):
+    """Base HTTP client of the Faythe API.
+
+    :param endpoint: A user-supplied endpoint URL for the Faythe service,
+                     or a list of the endpoint URLs of its replicas.
+    :param balancing: (optional) How the requests are spread over the
+                      replicas, see :class:`faytheclient.balancer.Balancer`.
+    :param eject_after: (optional) The number of consecutive failures
+                        after which a replica is ejected.
+    :param eject_for: (optional) The number of seconds a failing replica
+                      is ejected.
+    :param timeout: (optional) The requests read timeout in seconds.
+    :param connect_timeout: (optional) The connection timeout in
+                            seconds, defaults to the timeout.
+    :param deadline: (optional) The default number of seconds a call
+                     may take overall, retries included. Every request
+                     method also takes a 'deadline' argument.
+    :param retries: (optional) The maximum number of attempts of the
+                    idempotent requests, or a
+                    :class:`faytheclient.retry.RetryPolicy`.
+    :param circuit_breaker: (optional) True to share a
+                            :class:`faytheclient.retry.CircuitBreaker`
+                            between the clients of the endpoint, or a
+                            CircuitBreaker instance.
+    :param session: (optional) A requests Session to use, it is not
+                    closed with the client.
+    :param share_session: (optional) If True, use one session, thus one
+                          connection pool, for all the clients of the
+                          same endpoint.
+    :param cache: (optional) True or a ResponseCache to cache the
+                  responses of :meth:`get_json`.
+    :param cache_maxsize: (optional) The maximum number of cached
+                          responses when cache is True.
+    :param cache_ttl: (optional) The number of seconds a response is
+                      cached when cache is True.
+    :param shared_store: (optional) A
+                         :class:`faytheclient.shared.SharedStore`, or
+                         the path of its file, to share the cached
+                         responses with the other processes.
+    :param shared_namespace: (optional) Set by the clients to share
+                             the store only with the ones of the same
+                             user.
+    :param coalesce: (optional) True or a
+                     :class:`faytheclient.coalesce.SingleFlight` to share
+                     one request between the concurrent identical calls
+                     of :meth:`get_json`.
+    :param codec: (optional) The JSON backend name, see
+                  :func:`faytheclient.codec.get_codec`. Defaults to the
+                  fastest installed one.
+    :param compress_requests: (optional) True, the size in bytes from
+                              which the request bodies are compressed,
+                              or a
+                              :class:`faytheclient.compression.RequestCompressor`.
+                              The server must accept compressed bodies.
+    :param compress_encoding: (optional) The encoding of the compressed
+                              request bodies, gzip by default.
+    :param transport: (optional) 'http2' to multiplex the concurrent
+                      requests over HTTP/2 connections, falling back
+                      to HTTP/1.1 when the server doesn't negotiate
+                      it, see :func:`create_session`.
+    :param request_templates: (optional) The number of prepared
+                              requests kept per client, 0 to prepare
+                              every request from scratch. The templates
+                              are dropped when the session headers,
+                              auth, params, proxies or TLS settings
+                              change.
+    :param metrics: (optional) True or a
+                    :class:`faytheclient.metrics.Metrics` to record the
+                    requests latency, errors and sizes.
+    :param limiter: (optional) A :class:`faytheclient.limiter.RateLimiter`,
+                    share one between clients to bound their total load.
+    :param rate_limit: (optional) The maximum number of requests per
+                       second, when no limiter is given.
+    :param max_concurrency: (optional) The highest adaptive concurrency
+                            limit, when no limiter is given.
+    :param operation_limits: (optional) A dict mapping operation names
+                             to limits, when no limiter is given. See
+                             :class:`faytheclient.limiter.RateLimiter`.
+
+    The other optional parameters tune the connection pool, see
+    :func:`create_session`.
+    """
+
     def __init__(self, endpoint, **kwargs):
-        self.endpoint = endpoint.strip('/')
-        if not endpoint.startswith('http') and not endpoint.startswith('https'):
-            self.endpoint = 'http://{}'.format(endpoint)
+        if isinstance(endpoint, (list, tuple)):
+            self.endpoints = [_normalize_endpoint(e) for e in endpoint]
+        else:
+            self.endpoints = [_normalize_endpoint(endpoint)]
+        if not self.endpoints:
+            raise exceptions.InvalidEndpoint(message="No endpoint given")
+        self.endpoint = self.endpoints[0]
+        self.balancer = None
+        if len(self.endpoints) > 1:
+            self.balancer = replica_balancer.Balancer(
+                self.endpoints,
+                strategy=kwargs.get('balancing',
+                                    replica_balancer.LEAST_OUTSTANDING),
+                eject_after=kwargs.get('eject_after', 3),
+                eject_for=kwargs.get('eject_for', 30))
+        # Sessions and circuit breakers are shared by the clients of
+        # the same set of replicas.
+        endpoints_key = ','.join(self.endpoints)
         self.timeout = float(kwargs.get('timeout', 600))
-        self.session = requests.Session()
-        self.session.headers["User-Agent"] = USER_AGENT
+        self.connect_timeout = float(kwargs.get('connect_timeout') or
+                                     self.timeout)
+        self.deadline = kwargs.get('deadline')
+        pool_options = {k: kwargs[k] for k in POOL_OPTIONS if k in kwargs}
+        if len(self.endpoints) > 10:
+            # Keep a connection pool per replica.
+            pool_options.setdefault('pool_connections', len(self.endpoints))
+        self.session = kwargs.get('session')
+        if self.session is None and kwargs.get('share_session'):
+            self.session = get_shared_session(endpoints_key, **pool_options)
+        self._owns_session = self.session is None
+        if self.session is None:
+            self.session = create_session(**pool_options)
+        self.codec = json_codec.get_codec(kwargs.get('codec', 'auto'))
+        # Prepared requests by (method, endpoint, url, headers) and the
+        # environment settings, e.g. the proxies, by endpoint.
+        self.templates_maxsize = int(kwargs.get('request_templates', 256))
+        self._templates = {}
+        self._send_settings = {}
+        self._templates_state = None
+        self.shared_store = kwargs.get('shared_store')
+        if self.shared_store:
+            # Imported on demand, sqlite3 is slow to import.
+            from faytheclient import shared
+            self.shared_store = shared.get_store(self.shared_store)
+        else:
+            self.shared_store = None
+        self.shared_namespace = '%s|%s' % (
+            endpoints_key, kwargs.get('shared_namespace', ''))
+        self.compressor = kwargs.get('compress_requests')
+        encoding = kwargs.get('compress_encoding', 'gzip')
+        if self.compressor is True:
+            self.compressor = compression.RequestCompressor(
+                encoding=encoding)
+        elif isinstance(self.compressor, int) and self.compressor:
+            self.compressor = compression.RequestCompressor(
+                min_size=self.compressor, encoding=encoding)
+        elif not self.compressor:
+            self.compressor = None
+        self.cache = kwargs.get('cache')
+        if self.cache is True and self.shared_store is not None:
+            self.cache = shared.SharedResponseCache(
+                self.shared_store, self.shared_namespace,
+                maxsize=kwargs.get('cache_maxsize', 256),
+                ttl=kwargs.get('cache_ttl', 5), codec=self.codec)
+        elif self.cache is True:
+            self.cache = response_cache.ResponseCache(
+                maxsize=kwargs.get('cache_maxsize', 256),
+                ttl=kwargs.get('cache_ttl', 5))
+        elif not self.cache:
+            self.cache = None
+        self.coalescer = kwargs.get('coalesce')
+        if self.coalescer is True:
+            self.coalescer = coalesce.SingleFlight()
+        elif not self.coalescer:
+            self.coalescer = None
+        self.metrics = kwargs.get('metrics')
+        if self.metrics is True:
+            self.metrics = request_metrics.Metrics()
+        elif not self.metrics:
+            self.metrics = None
+        self.limiter = kwargs.get('limiter')
+        if self.limiter is None and (kwargs.get('rate_limit') or
+                                     kwargs.get('max_concurrency') or
+                                     kwargs.get('operation_limits')):
+            self.limiter = rate_limiter.RateLimiter(
+                rate=kwargs.get('rate_limit'),
+                max_concurrency=kwargs.get('max_concurrency'),
+                operations=kwargs.get('operation_limits'))
+        self.retry = kwargs.get('retries')
+        if self.retry and not isinstance(self.retry,
+                                         retry_policy.RetryPolicy):
+            self.retry = retry_policy.RetryPolicy(attempts=self.retry)
+        elif not self.retry:
+            self.retry = None
+        self.circuit_breaker = kwargs.get('circuit_breaker')
+        if self.circuit_breaker is True:
+            self.circuit_breaker = retry_policy.get_circuit_breaker(
+                endpoints_key)
+        elif not self.circuit_breaker:
+            self.circuit_breaker = None
 
     def __del__(self):
-        if self.session:
+        self.close()
+
+    def close(self):
+        if getattr(self, 'session', None):
+            if not self._owns_session:
+                self.session = None
+                return
             try:
                 self.session.close()
             except Exception as e:
@@ -53,18 +402,144 @@ class HTTPClient(object):
     def _request(self, method, url, body=None, **kwargs):
         """Send an http request with the specified characteristics.
         """
+        deadline = kwargs.pop('deadline', self.deadline)
+        if self.retry is None and self.circuit_breaker is None and \
+                deadline is None:
+            return self._attempt(method, url, body, **kwargs)
+
+        expires_at = None
+        if deadline is not None:
+            expires_at = time.monotonic() + float(deadline)
+        attempt = 0
+        while True:
+            attempt += 1
+            if expires_at is not None:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    raise exceptions.DeadlineExceeded(
+                        message="%s %s did not complete within %ss" %
+                        (method, url, deadline))
+                # Never wait for a response past the deadline.
+                kwargs['timeout'] = (min(self.connect_timeout, remaining),
+                                     min(self.timeout, remaining))
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.allow()
+            try:
+                resp = self._attempt(method, url, body, **kwargs)
+            except Exception as e:
+                if self.circuit_breaker is not None:
+                    if retry_policy.is_server_failure(e):
+                        self.circuit_breaker.record_failure()
+                    else:
+                        self.circuit_breaker.record_success()
+                if expires_at is not None and \
+                        isinstance(e, exceptions.InvalidEndpoint) and \
+                        time.monotonic() >= expires_at:
+                    # The timeout was shortened to the deadline.
+                    raise exceptions.DeadlineExceeded(
+                        message="%s %s did not complete within %ss: %s" %
+                        (method, url, deadline, e))
+                if self.retry is None or attempt >= self.retry.attempts or \
+                        not self.retry.is_retryable(method, e):
+                    raise
+                delay = self.retry.delay(attempt, e)
+                if expires_at is not None and \
+                        time.monotonic() + delay >= expires_at:
+                    raise
+                LOG.debug("Retrying %s %s in %.2fs after: %s" %
+                          (method, url, delay, e))
+                time.sleep(delay)
+                continue
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_success()
+            return resp
+
+    def _attempt(self, method, url, body=None, **kwargs):
+        # The replica logins are sent while the request needing the jwt
+        # holds its permit, waiting for another one could deadlock.
+        limiter = self.limiter if kwargs.pop('limited', True) else None
+        if self.metrics is None and limiter is None:
+            return self._send(method, url, body, **kwargs)
+        permit = sample = None
+        if limiter is not None:
+            permit = limiter.acquire(request_metrics.current_operation())
+        if self.metrics is not None:
+            sample = self.metrics.start(method, url)
+        try:
+            resp = self._send(method, url, body, **kwargs)
+        except Exception as e:
+            if sample is not None:
+                self.metrics.finish(sample, exception=e)
+            if permit is not None:
+                limiter.release(permit, exception=e)
+            raise
+        if sample is not None:
+            self.metrics.finish(sample, resp)
+        if permit is not None:
+            limiter.release(permit, resp)
+        return resp
+
+    def _send(self, method, url, body=None, **kwargs):
+        if self.balancer is None:
+            return self._send_to(None, method, url, body, **kwargs)
+        pinned = kwargs.pop('replica', None)
+        tried = []
+        while True:
+            replica = self.balancer.pick(exclude=tried, replica=pinned)
+            started_at = time.monotonic()
+            try:
+                resp = self._send_to(replica, method, url, body, **kwargs)
+            except Exception as e:
+                failed = retry_policy.is_server_failure(e)
+                self.balancer.release(replica,
+                                      time.monotonic() - started_at, failed)
+                tried.append(replica)
+                # Fail over the idempotent requests to another replica.
+                if pinned is not None or not failed or \
+                        method not in IDEMPOTENT_METHODS or \
+                        len(tried) >= len(self.balancer.replicas):
+                    raise
+                LOG.debug("Failing over %s %s from %s: %s" %
+                          (method, url, replica.endpoint, e))
+                continue
+            self.balancer.release(replica, time.monotonic() - started_at)
+            return resp
+
+    def _send_to(self, replica, method, url, body=None, **kwargs):
+        endpoint = self.endpoint if replica is None else replica.endpoint
         # Copy the kwargs so we can reuse the original in case of redirects
-        headers = copy.deepcopy(kwargs.pop('headers', {}))
+        headers = dict(kwargs.pop('headers', {}))
         if headers.get('Content-Type', 'application/json') is None:
             headers['Content-Type'] = 'application/json'
-        if self.endpoint.endswith("/") or url.startswith("/"):
-            conn_url = "%s%s" % (self.endpoint, url)
+        body_size = None
+        if body is not None:
+            kwargs['data'] = self.codec.dumps(body)
+            headers.setdefault('Content-Type', 'application/json')
+            if self.compressor is not None:
+                body_size = len(kwargs['data'])
+                kwargs['data'] = self.compressor.compress(kwargs['data'],
+                                                          headers)
+        timeout = kwargs.pop('timeout', None) or (self.connect_timeout,
+                                                  self.timeout)
+        token = None
+        if replica is not None and replica.token_manager is not None and \
+                'Authorization' in headers:
+            token = replica.token_manager.get()
+            headers['Authorization'] = token
+        if endpoint.endswith("/") or url.startswith("/"):
+            conn_url = "%s%s" % (endpoint, url)
         else:
-            conn_url = "%s/%s" % (self.endpoint, url)
+            conn_url = "%s/%s" % (endpoint, url)
         try:
-            resp = self.session.request(method, conn_url,
-                                        json=body, headers=headers,
-                                        timeout=self.timeout, **kwargs)
+            if self.templates_maxsize and TEMPLATE_KWARGS.issuperset(
+                    kwargs) and not self.session.cookies:
+                resp = self._send_template(method, endpoint, url,
+                                           conn_url, headers, timeout,
+                                           **kwargs)
+            else:
+                resp = self.session.request(method, conn_url,
+                                            headers=headers,
+                                            timeout=timeout, **kwargs)
         except requests.exceptions.Timeout as e:
             message = ("Error communicating with %(url)s: %(e)s" %
                        dict(url=conn_url, e=e))
@@ -75,10 +550,9 @@ class HTTPClient(object):
             raise exceptions.CommunicationError(message=message)
         except socket.gaierror as e:
             message = "Error finding address for %s: %s" % (
-                self.endpoint, e)
+                endpoint, e)
             raise exceptions.InvalidEndpoint(message=message)
         except (socket.error, socket.timeout, IOError) as e:
-            endpoint = self.endpoint
             message = ("Error communicating with %(endpoint)s %(e)s" %
                        {'endpoint': endpoint, 'e': e})
             raise exceptions.CommunicationError(message=message)
@@ -88,7 +562,54 @@ class HTTPClient(object):
         LOG.debug('%(method)s call to image for %(url)s.',
                   {'method': resp.request.method,
                    'url': resp.url})
-        return self._handle_response(resp)
+        if body_size is not None and 'Content-Encoding' in headers:
+            # Measured by the metrics.
+            resp.request.uncompressed_size = body_size
+        if token is not None and resp.status_code == 401:
+            # Log in to this replica again on the next request.
+            replica.token_manager.invalidate(token)
+        resp = self._handle_response(resp)
+        if self.cache is not None and method not in ('GET', 'HEAD'):
+            # Nothing is dropped for a login, see cache.dependent_paths.
+            self.cache.invalidate(url)
+        return resp
+
+    def _send_template(self, method, endpoint, url, conn_url, headers,
+                       timeout, data=None, stream=None):
+        # Does what Session.request does, with the request prepared and
+        # the environment read once per route.
+        state = _session_state(self.session)
+        if state != self._templates_state:
+            # Prepared with the previous session settings.
+            self._templates = {}
+            self._send_settings = {}
+            self._templates_state = state
+        key = (method, endpoint, url, tuple(headers.items()))
+        template = self._templates.get(key)
+        if template is None:
+            template = self.session.prepare_request(
+                requests.Request(method, conn_url, headers=headers))
+            if len(self._templates) >= self.templates_maxsize:
+                try:
+                    del self._templates[next(iter(self._templates))]
+                except (KeyError, RuntimeError, StopIteration):
+                    # Evicted by another thread.
+                    pass
+            self._templates[key] = template
+        settings = self._send_settings.get(endpoint)
+        if settings is None:
+            settings = self._send_settings[endpoint] = \
+                self.session.merge_environment_settings(
+                    conn_url, {}, None, None, None)
+        prepared = _copy_prepared(template)
+        if data is not None:
+            prepared.prepare_body(data, None)
+        if stream is None:
+            return self.session.send(prepared, timeout=timeout,
+                                     allow_redirects=True, **settings)
+        return self.session.send(prepared, timeout=timeout,
+                                 allow_redirects=True,
+                                 **dict(settings, stream=stream))
 
     def _handle_response(self, response):
         try:
@@ -98,16 +619,86 @@ class HTTPClient(object):
 
             # Attempt to get Error message from response
             try:
-                error_dict = response.json()
-            except (json.decoder.JSONDecodeError,
-                    simplejson.errors.JSONDecodeError):
+                error_dict = self.codec.loads(response.content)
+            except ValueError:
                 pass
             else:
                 err_msg += " [Error: {}]".format(error_dict)
-            raise requests.exceptions.HTTPError(err_msg)
+            raise requests.exceptions.HTTPError(err_msg, response=response)
         else:
             return response
 
+    def decode(self, response):
+        """Decode the JSON body of a response with the client codec."""
+        if self.metrics is None:
+            return self.codec.loads(response.content)
+        started_at = time.perf_counter()
+        value = self.codec.loads(response.content)
+        request = response.request
+        self.metrics.observe_decode(request.method, request.path_url,
+                                    time.perf_counter() - started_at)
+        return value
+
+    def get_json(self, url, **kwargs):
+        """GET an url and return its decoded JSON body.
+
+        If the cache is enabled, a fresh cached body is returned without
+        a request and an expired one is revalidated with its ETag or
+        Last-Modified header. If the requests are coalesced, concurrent
+        calls for the same url and jwt share the decoded body.
+        """
+        if self.coalescer is None:
+            return self._get_json(url, **kwargs)
+        key = coalesce.request_key('GET', url, kwargs.get('headers'))
+        return self.coalescer.do(key, self._get_json, url, **kwargs)
+
+    def _get_json(self, url, **kwargs):
+        if self.cache is None:
+            return self.decode(self.get(url, **kwargs))
+
+        key = ('GET', url)
+        generation = self.cache.generation
+        entry = self.cache.lookup(key)
+        if entry is not None and entry.fresh:
+            return entry.value
+        if entry is not None:
+            headers = dict(kwargs.pop('headers', None) or {})
+            if entry.etag is not None:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified is not None:
+                headers['If-Modified-Since'] = entry.last_modified
+            kwargs['headers'] = headers
+        resp = self.get(url, **kwargs)
+        if entry is not None:
+            if resp.status_code == 304:
+                self.cache.revalidate(key, entry)
+                return entry.value
+            self.cache.record_miss()
+        value = self.decode(resp)
+        self.cache.store(key, value, resp.headers.get('ETag'),
+                         resp.headers.get('Last-Modified'), generation)
+        return value
+
+    def iter_json(self, url, key='data', **kwargs):
+        """GET an url and iterate over the items of its JSON body.
+
+        The body is streamed and parsed incrementally, see
+        :func:`faytheclient.stream.iter_items`. The request is sent
+        before returning, the connection is released once the iterator
+        is exhausted or closed.
+        """
+        resp = self.get(url, stream=True, **kwargs)
+        return self._iter_response(resp, key)
+
+    @staticmethod
+    def _iter_response(resp, key):
+        try:
+            for item in stream.iter_items(
+                    resp.iter_content(stream.CHUNK_SIZE), key):
+                yield item
+        finally:
+            resp.close()
+
     def head(self, url, **kwargs):
         return self._request('HEAD', url, **kwargs)
 
@@ -0,0 +1,241 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""The HTTP/2 transport, sending the requests with httpx.
+
+A requests connection serves one request at a time, hundreds of
+concurrent calls open hundreds of connections. Over HTTP/2 the
+concurrent requests of all the threads, or coroutines, are multiplexed
+over a single connection per replica::
+
+    client.Client(endpoint, username, password, transport='http2')
+
+HTTP/2 is negotiated with ALPN over TLS, the requests fall back to
+HTTP/1.1 when the server doesn't offer it. Over plain http HTTP/1.1 is
+used, unless the transport is 'h2c': the server is then expected to
+speak HTTP/2 without negotiation.
+
+Requires httpx with its http2 extra: pip install faytheclient[http2]
+"""
+
+import datetime
+import threading
+
+import httpx
+import requests
+from requests import adapters
+from requests import structures
+from requests import utils as requests_utils
+
+from faytheclient import http
+
+TRANSPORTS = ('http2', 'h2c')
+# The HTTP/1.1 connection headers, forbidden over HTTP/2.
+HOP_BY_HOP_HEADERS = frozenset(['connection', 'keep-alive',
+                                'proxy-connection', 'transfer-encoding',
+                                'upgrade'])
+
+
+def _timeout(timeout):
+    # requests takes a (connect, read) tuple or a single timeout.
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+def _headers(headers):
+    return [(name, value) for name, value in headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS]
+
+
+def _requests_exception(exception, request=None):
+    """Return the requests exception matching an httpx one, they are
+    handled by the HTTPClient.
+    """
+    if isinstance(exception, httpx.ConnectTimeout):
+        cls = requests.exceptions.ConnectTimeout
+    elif isinstance(exception, httpx.TimeoutException):
+        cls = requests.exceptions.ReadTimeout
+    elif isinstance(exception, httpx.ProxyError):
+        cls = requests.exceptions.ProxyError
+    elif isinstance(exception, httpx.RemoteProtocolError):
+        cls = requests.exceptions.ChunkedEncodingError
+    else:
+        cls = requests.exceptions.ConnectionError
+    return cls(exception, request=request)
+
+
+class _Body(object):
+    """The body of an httpx response, read by requests.Response.
+
+    :attr http_version: The negotiated version, e.g. 'HTTP/2'.
+    """
+
+    def __init__(self, response, request):
+        self._response = response
+        self._request = request
+        self.http_version = response.http_version
+
+    def stream(self, chunk_size=None, decode_content=True):
+        try:
+            for chunk in self._response.iter_bytes(chunk_size):
+                yield chunk
+        except httpx.TransportError as e:
+            raise _requests_exception(e, self._request)
+        finally:
+            self._response.close()
+
+    def read(self, amt=None, decode_content=True):
+        return b''.join(self.stream(amt))
+
+    def tell(self):
+        """Return the number of bytes received before decoding."""
+        return self._response.num_bytes_downloaded
+
+    def close(self):
+        self._response.close()
+
+
+class HTTP2Adapter(adapters.BaseAdapter):
+    """A requests transport adapter multiplexing the requests over
+    HTTP/2 connections.
+
+    The responses are plain requests.Response, the adapter is mounted
+    on the session by :func:`faytheclient.http.create_session`.
+
+    :param pool_maxsize: The maximum number of connections per host,
+                         each one carries many concurrent requests.
+    :param keepalive: Enable TCP keep-alive on the connections.
+    :param ssl_context: (optional) A ssl.SSLContext shared by all the
+                        connections.
+    :param prior_knowledge: If True, speak HTTP/2 over plain http
+                            without negotiating it.
+    """
+
+    def __init__(self, pool_maxsize=10, keepalive=True, ssl_context=None,
+                 prior_knowledge=False):
+        super(HTTP2Adapter, self).__init__()
+        self.pool_maxsize = int(pool_maxsize)
+        self.keepalive = keepalive
+        self.ssl_context = ssl_context
+        self.prior_knowledge = prior_knowledge
+        # httpx clients by TLS and proxy settings.
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _client(self, verify, cert, proxy):
+        key = (verify, cert, proxy)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                socket_options = None
+                if self.keepalive:
+                    socket_options = http._keepalive_socket_options()
+                transport = httpx.HTTPTransport(
+                    verify=self.ssl_context or verify, cert=cert,
+                    http1=not self.prior_knowledge, http2=True,
+                    limits=httpx.Limits(
+                        max_connections=self.pool_maxsize,
+                        max_keepalive_connections=self.pool_maxsize),
+                    proxy=proxy, socket_options=socket_options)
+                # The redirects and the environment are handled by the
+                # requests session.
+                client = self._clients[key] = httpx.Client(
+                    transport=transport, follow_redirects=False,
+                    trust_env=False)
+        return client
+
+    def send(self, request, stream=False, timeout=None, verify=True,
+             cert=None, proxies=None):
+        proxy = requests_utils.select_proxy(request.url, proxies)
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        client = self._client(verify, cert, proxy)
+        try:
+            sent = client.build_request(request.method, request.url,
+                                        headers=_headers(request.headers),
+                                        content=request.body,
+                                        timeout=_timeout(timeout))
+            resp = client.send(sent, stream=True)
+        except httpx.TransportError as e:
+            raise _requests_exception(e, request)
+        return self.build_response(request, resp)
+
+    def build_response(self, request, resp):
+        response = requests.Response()
+        response.status_code = resp.status_code
+        response.reason = resp.reason_phrase
+        response.headers = structures.CaseInsensitiveDict(
+            resp.headers.items())
+        response.encoding = requests_utils.get_encoding_from_headers(
+            response.headers)
+        response.raw = _Body(resp, request)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        # Measured by the session.
+        response.elapsed = datetime.timedelta(0)
+        return response
+
+    def close(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = {}
+        for client in clients:
+            client.close()
+
+
+def create_async_client(pool_maxsize=100, timeout=600, ssl_context=None,
+                        prior_knowledge=False):
+    """Return the httpx.AsyncClient of the AsyncHTTPClient.
+
+    :param timeout: The timeout in seconds, or a (connect, read) tuple.
+    """
+    return httpx.AsyncClient(
+        http1=not prior_knowledge, http2=True,
+        verify=ssl_context or True,
+        limits=httpx.Limits(max_connections=pool_maxsize,
+                            max_keepalive_connections=pool_maxsize),
+        timeout=_timeout(timeout), follow_redirects=True,
+        trust_env=True)
+
+
+async def send_async(client, method, url, headers=None, data=None,
+                     auth=None):
+    """Send a request with an httpx.AsyncClient.
+
+    :returns: The httpx response, with its body read.
+    :raises: The requests exception matching a transport error.
+    """
+    # A dict is a form, like aiohttp and requests send it.
+    if isinstance(data, dict):
+        body = {'data': data}
+    else:
+        body = {'content': data}
+    try:
+        return await client.request(method, url,
+                                    headers=_headers(headers or {}),
+                                    auth=auth, **body)
+    except httpx.TransportError as e:
+        raise _requests_exception(e)
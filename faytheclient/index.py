@@ -0,0 +1,181 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""An in-memory index answering the listing filters locally.
+
+Build a :class:`TagIndex` from one full listing, then query it with
+the filters of :meth:`faytheclient.client.Client.list_clouds` instead
+of sending a request for every combination::
+
+    idx = index.TagIndex(client.list_clouds())
+    idx.query(tags=['production'], tags_any=['hn', 'hcm'])
+"""
+
+import threading
+
+from faytheclient import reconcile
+
+_EMPTY = frozenset()
+
+
+def _split(tags):
+    # The filters are given as lists or as comma separated strings.
+    if not tags:
+        return ()
+    if isinstance(tags, str):
+        return tuple(t.strip() for t in tags.split(',') if t.strip())
+    return tuple(tags)
+
+
+class TagIndex(object):
+    """An inverted index of objects by tag, provider and cloud.
+
+    The indexed objects are shared and must not be modified.
+
+    :param listing: (optional) A decoded listing, see
+                    :func:`faytheclient.reconcile.listing_items`.
+    """
+
+    def __init__(self, listing=None):
+        self._objects = {}
+        self._by_tag = {}
+        self._by_provider = {}
+        self._by_cloud = {}
+        self._lock = threading.Lock()
+        if listing is not None:
+            self.refresh(listing)
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __contains__(self, id):
+        return id in self._objects
+
+    def _index(self, id, obj):
+        self._objects[id] = obj
+        for tag in _split(obj.get('tags')):
+            self._by_tag.setdefault(tag, set()).add(id)
+        if obj.get('provider') is not None:
+            self._by_provider.setdefault(obj['provider'], set()).add(id)
+        if obj.get('cloudid') is not None:
+            self._by_cloud.setdefault(obj['cloudid'], set()).add(id)
+
+    def _unindex(self, id):
+        obj = self._objects.pop(id, None)
+        if obj is None:
+            return
+        for index, values in ((self._by_tag, _split(obj.get('tags'))),
+                              (self._by_provider, (obj.get('provider'),)),
+                              (self._by_cloud, (obj.get('cloudid'),))):
+            for value in values:
+                ids = index.get(value)
+                if ids is None:
+                    continue
+                ids.discard(id)
+                if not ids:
+                    del index[value]
+
+    def add(self, obj):
+        """Index an object, replacing the one with the same id."""
+        with self._lock:
+            self._unindex(obj['id'])
+            self._index(obj['id'], obj)
+
+    def remove(self, id):
+        with self._lock:
+            self._unindex(id)
+
+    def refresh(self, listing):
+        """Make the index match a new full listing.
+
+        Only the objects which were added, changed or removed are
+        reindexed.
+
+        :returns: The number of reindexed objects.
+        """
+        items = {obj['id']: obj for obj in reconcile.listing_items(listing)}
+        changed = 0
+        with self._lock:
+            for id in [id for id in self._objects if id not in items]:
+                self._unindex(id)
+                changed += 1
+            for id, obj in items.items():
+                old = self._objects.get(id)
+                if old is obj or old == obj:
+                    continue
+                self._unindex(id)
+                self._index(id, obj)
+                changed += 1
+        return changed
+
+    def apply(self, events):
+        """Apply the events of a :class:`faytheclient.watch.Watcher`.
+
+        Subscribe it to a watcher to keep the index up to date, events
+        of the other kinds have to be filtered out first.
+        """
+        with self._lock:
+            for event in events:
+                self._unindex(event.id)
+                if event.type != 'removed':
+                    self._index(event.id, event.obj)
+
+    def get(self, id):
+        return self._objects.get(id)
+
+    def query(self, tags=None, tags_any=None, id=None, provider=None,
+              cloud_id=None):
+        """Return the objects matching all the filters.
+
+        :param tags: (optional) Tags the objects must all have.
+        :param tags_any: (optional) Tags the objects must have one of.
+        :param id: (optional) The id of the object.
+        :param provider: (optional) The provider of the clouds.
+        :param cloud_id: (optional) The cloud of the objects.
+        """
+        with self._lock:
+            candidates = []
+            if id is not None:
+                candidates.append({id} if id in self._objects else _EMPTY)
+            if provider is not None:
+                candidates.append(self._by_provider.get(provider, _EMPTY))
+            if cloud_id is not None:
+                candidates.append(self._by_cloud.get(cloud_id, _EMPTY))
+            for tag in _split(tags):
+                candidates.append(self._by_tag.get(tag, _EMPTY))
+            any_tags = _split(tags_any)
+            if any_tags:
+                candidates.append(set().union(
+                    *(self._by_tag.get(tag, _EMPTY) for tag in any_tags)))
+            if not candidates:
+                return list(self._objects.values())
+            # Intersect starting with the smallest set.
+            candidates.sort(key=len)
+            ids = set(candidates[0])
+            for other in candidates[1:]:
+                if not ids:
+                    break
+                ids.intersection_update(other)
+            return [self._objects[i] for i in ids]
+
+    def tags(self):
+        """Return the number of objects by tag."""
+        with self._lock:
+            return {tag: len(ids) for tag, ids in self._by_tag.items()}
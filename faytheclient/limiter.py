@@ -0,0 +1,241 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Client side rate and concurrency limits.
+
+A :class:`RateLimiter` combines a token bucket, bounding the request
+rate, with an adaptive concurrency limit. The concurrency limit grows
+by one for every limit's worth of successful requests and is halved
+when the server is overloaded, i.e. answers with a 429 or a 5xx, times
+out or gets slower than a latency target (AIMD).
+
+A limiter is thread-safe, share one between the clients of a process
+to bound their total load.
+"""
+
+import threading
+import time
+
+from faytheclient import exceptions
+
+
+def _is_overloaded(status_code, exception):
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    return isinstance(exception, (exceptions.CommunicationError,
+                                  exceptions.InvalidEndpoint))
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket(object):
+    """Allow `rate` acquisitions per second, with bursts of `burst`.
+
+    :param rate: The number of tokens added per second.
+    :param burst: (optional) The bucket size, defaults to the rate.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(rate, 1))
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        # Nothing is handed out before, set after a Retry-After.
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # Take a token, possibly in advance, and return the delay after
+        # which it is really available.
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens +
+                              (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            delay = max(self.paused_until - now, 0.0)
+            if self.tokens < 0:
+                delay = max(delay, -self.tokens / self.rate)
+            return delay
+
+    def acquire(self):
+        """Wait until a token is available."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        """Hand out no token for a number of seconds."""
+        with self._lock:
+            self.paused_until = max(self.paused_until,
+                                    time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency(object):
+    """A concurrency limit adjusted with additive increase and
+    multiplicative decrease.
+
+    :param initial: The initial limit.
+    :param minimum: The lowest limit.
+    :param maximum: The highest limit.
+    :param latency_target: (optional) A latency, in seconds, above which
+                           the server is considered overloaded.
+    :param backoff: The factor the limit is multiplied by when the
+                    server is overloaded.
+    """
+
+    def __init__(self, initial=10, minimum=1, maximum=200,
+                 latency_target=None, backoff=0.5):
+        self.minimum = max(int(minimum), 1)
+        self.maximum = max(int(maximum), self.minimum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target = latency_target
+        self.backoff = float(backoff)
+        self.inflight = 0
+        self._decreased_at = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.inflight >= int(self.limit):
+                self._condition.wait()
+            self.inflight += 1
+
+    def release(self, started_at, overloaded=False):
+        """Release a slot taken at `started_at` and adapt the limit."""
+        with self._condition:
+            self.inflight -= 1
+            now = time.monotonic()
+            latency = now - started_at
+            if self.latency_target is not None and \
+                    latency > self.latency_target:
+                overloaded = True
+            if overloaded:
+                # The requests sent before the last decrease see the
+                # same overload, decrease once per round trip.
+                if started_at > self._decreased_at:
+                    self.limit = max(self.minimum,
+                                     self.limit * self.backoff)
+                    self._decreased_at = now
+            else:
+                self.limit = min(self.maximum,
+                                 self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class _Limits(object):
+    __slots__ = ('bucket', 'concurrency')
+
+    def __init__(self, rate=None, burst=None, max_concurrency=None,
+                 min_concurrency=1, initial_concurrency=None,
+                 latency_target=None):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.concurrency = None
+        if max_concurrency:
+            self.concurrency = AdaptiveConcurrency(
+                initial_concurrency or max_concurrency, min_concurrency,
+                max_concurrency, latency_target)
+
+
+class Permit(object):
+    # started_at is taken once every limit allowed the request, so the
+    # time spent waiting isn't counted as server latency.
+    __slots__ = ('limits', 'started_at')
+
+    def __init__(self, limits, started_at):
+        self.limits = limits
+        self.started_at = started_at
+
+
+class RateLimiter(object):
+    """Limit the rate and the concurrency of the requests.
+
+    The keyword arguments configure the global limits, every request
+    is subject to them and to the limits of its operation.
+
+    :param rate: (optional) The maximum number of requests per second.
+    :param burst: (optional) The number of requests sent at once after
+                  an idle period, defaults to the rate.
+    :param max_concurrency: (optional) The highest concurrency limit,
+                            enables the adaptive limit.
+    :param min_concurrency: (optional) The lowest concurrency limit.
+    :param initial_concurrency: (optional) The starting concurrency
+                                limit, defaults to max_concurrency.
+    :param latency_target: (optional) The latency, in seconds, above
+                           which the concurrency limit is decreased.
+    :param operations: (optional) A dict mapping operation names, e.g.
+                       'create_silence', to dicts of the same options.
+    """
+
+    def __init__(self, operations=None, **kwargs):
+        self.limits = _Limits(**kwargs)
+        self.operations = {name: _Limits(**options)
+                           for name, options in (operations or {}).items()}
+
+    def acquire(self, operation=None):
+        """Wait for the limits of an operation to allow a request.
+
+        :returns: A :class:`Permit` to give back to :meth:`release`.
+        """
+        limits = [self.limits]
+        if operation in self.operations:
+            # Always acquire the operation limits first, so threads
+            # never wait for each other in opposite orders.
+            limits.insert(0, self.operations[operation])
+        for limit in limits:
+            if limit.concurrency is not None:
+                limit.concurrency.acquire()
+        for limit in limits:
+            if limit.bucket is not None:
+                limit.bucket.acquire()
+        return Permit(limits, time.monotonic())
+
+    def release(self, permit, response=None, exception=None):
+        """Give back a permit once its request is done.
+
+        :param response: The response, if any was received.
+        :param exception: The exception raised, if any.
+        """
+        if response is None and exception is not None:
+            response = getattr(exception, 'response', None)
+        status_code = getattr(response, 'status_code', None)
+        overloaded = _is_overloaded(status_code, exception)
+        retry_after = _retry_after(response) if status_code == 429 else None
+        for limit in permit.limits:
+            if limit.concurrency is not None:
+                limit.concurrency.release(permit.started_at, overloaded)
+            if retry_after and limit.bucket is not None:
+                limit.bucket.pause(retry_after)
+
+    def stats(self):
+        stats = {}
+        for name, limits in [(None, self.limits)] + \
+                sorted(self.operations.items()):
+            if limits.concurrency is not None:
+                stats[name or '*'] = {
+                    'limit': int(limits.concurrency.limit),
+                    'inflight': limits.concurrency.inflight,
+                }
+        return stats
@@ -0,0 +1,399 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Per operation request metrics of the HTTPClient.
+
+The requests are grouped by logical operation, the name of the
+:class:`faytheclient.client.Client` method sending them, e.g.
+'list_clouds'. Requests sent outside of an operation are grouped by
+method and resource, e.g. 'GET /clouds'.
+
+The latency is split into phases:
+
+- ttfb: from sending the request to receiving the response headers,
+  it includes connecting when no pooled connection was available.
+- read: reading the response body, unless it is streamed.
+- decode: decoding the JSON body.
+- total: the whole request, without decoding.
+
+The body sizes are counted decoded, bytes_in and bytes_out, and as
+sent over the wire, compressed or not, wire_bytes_in and
+wire_bytes_out.
+"""
+
+import bisect
+import collections
+import logging
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+# Upper bounds of the latency histograms buckets, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASES = ('ttfb', 'read', 'decode', 'total')
+
+
+class Histogram(object):
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Return the (upper bound, cumulative count) pairs."""
+        total = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class OperationStats(object):
+    __slots__ = ('requests', 'errors', 'bytes_in', 'bytes_out',
+                 'wire_bytes_in', 'wire_bytes_out', 'latency')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = collections.Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.wire_bytes_in = 0
+        self.wire_bytes_out = 0
+        self.latency = {}
+
+    def observe(self, phase, value):
+        histogram = self.latency.get(phase)
+        if histogram is None:
+            histogram = self.latency[phase] = Histogram()
+        histogram.observe(value)
+
+
+class Sample(object):
+    """A request being measured, passed to the callbacks once done.
+
+    The durations are in seconds, a phase which wasn't measured is None.
+    """
+
+    __slots__ = ('operation', 'method', 'url', 'started_at', 'status_code',
+                 'exception', 'ttfb', 'read', 'total', 'bytes_in',
+                 'bytes_out', 'wire_bytes_in', 'wire_bytes_out', 'span')
+
+    def __init__(self, operation, method, url):
+        self.operation = operation
+        self.method = method
+        self.url = url
+        self.started_at = time.perf_counter()
+        self.status_code = None
+        self.exception = None
+        self.ttfb = None
+        self.read = None
+        self.total = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.wire_bytes_in = 0
+        self.wire_bytes_out = 0
+        self.span = None
+
+    def __repr__(self):
+        return '<Sample %s %s %s>' % (self.operation, self.status_code,
+                                      self.total)
+
+
+_local = threading.local()
+
+
+class _Operation(object):
+    __slots__ = ('name', 'previous')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'operation', None)
+        _local.operation = self.name
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.operation = self.previous
+
+
+def operation(name):
+    """Return a context manager naming the requests sent by a thread."""
+    return _Operation(name)
+
+
+def current_operation():
+    """Return the name of the operation of the thread, or None."""
+    return getattr(_local, 'operation', None)
+
+
+class Metrics(object):
+    """Collect the request count, errors, latency and sizes by operation.
+
+    :param callbacks: (optional) Callables called with every finished
+                      :class:`Sample`. They run in the thread sending
+                      the request and must be fast, their exceptions
+                      are logged and ignored.
+    :param tracer: (optional) An OpenTelemetry Tracer, a span is
+                   started for every request.
+    """
+
+    def __init__(self, callbacks=(), tracer=None):
+        self.callbacks = list(callbacks)
+        self.tracer = tracer
+        self.token_refreshes = 0
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def _current_operation(self, method, url):
+        name = current_operation()
+        if name is None:
+            resource = url.lstrip('/').split('/', 1)[0].split('?', 1)[0]
+            name = '%s /%s' % (method, resource)
+        return name
+
+    def _stats(self, operation):
+        stats = self._operations.get(operation)
+        if stats is None:
+            stats = self._operations[operation] = OperationStats()
+        return stats
+
+    def start(self, method, url):
+        sample = Sample(self._current_operation(method, url), method, url)
+        if self.tracer is not None:
+            sample.span = self.tracer.start_span(
+                'faythe %s' % sample.operation,
+                attributes={'http.method': method, 'http.url': url})
+        return sample
+
+    def finish(self, sample, response=None, exception=None):
+        """Record a request sent by :meth:`start`.
+
+        :param response: The response, if any was received.
+        :param exception: The exception raised to the caller, if any.
+        """
+        sample.total = time.perf_counter() - sample.started_at
+        sample.exception = exception
+        if response is None and exception is not None:
+            response = getattr(exception, 'response', None)
+        if response is not None:
+            _measure_response(sample, response)
+
+        with self._lock:
+            stats = self._stats(sample.operation)
+            stats.requests += 1
+            if exception is not None:
+                stats.errors[exception.__class__.__name__] += 1
+            stats.bytes_in += sample.bytes_in
+            stats.bytes_out += sample.bytes_out
+            stats.wire_bytes_in += sample.wire_bytes_in
+            stats.wire_bytes_out += sample.wire_bytes_out
+            for phase in ('ttfb', 'read', 'total'):
+                value = getattr(sample, phase)
+                if value is not None:
+                    stats.observe(phase, value)
+
+        if sample.span is not None:
+            _end_span(sample)
+        for callback in self.callbacks:
+            try:
+                callback(sample)
+            except Exception as e:
+                LOG.exception("Metrics callback failed: {}".format(e))
+
+    def observe_decode(self, method, url, duration):
+        operation = self._current_operation(method, url)
+        with self._lock:
+            self._stats(operation).observe('decode', duration)
+
+    def record_token_refresh(self):
+        with self._lock:
+            self.token_refreshes += 1
+
+    def reset(self):
+        with self._lock:
+            self.token_refreshes = 0
+            self._operations = {}
+
+    def snapshot(self):
+        """Return the metrics as a dict of plain values."""
+        with self._lock:
+            operations = {}
+            for name, stats in self._operations.items():
+                operations[name] = {
+                    'requests': stats.requests,
+                    'errors': dict(stats.errors),
+                    'bytes_in': stats.bytes_in,
+                    'bytes_out': stats.bytes_out,
+                    'wire_bytes_in': stats.wire_bytes_in,
+                    'wire_bytes_out': stats.wire_bytes_out,
+                    'latency': {
+                        phase: {'count': h.count, 'sum': h.sum,
+                                'buckets': list(h.cumulative())}
+                        for phase, h in stats.latency.items()},
+                }
+            return {'token_refreshes': self.token_refreshes,
+                    'operations': operations}
+
+    def compression(self):
+        """Return the body sizes of all the operations and their
+        compression ratios, the decoded size divided by the wire one.
+        """
+        totals = dict.fromkeys(('bytes_in', 'wire_bytes_in', 'bytes_out',
+                                'wire_bytes_out'), 0)
+        with self._lock:
+            for stats in self._operations.values():
+                for name in totals:
+                    totals[name] += getattr(stats, name)
+        totals['ratio_in'] = _ratio(totals['bytes_in'],
+                                    totals['wire_bytes_in'])
+        totals['ratio_out'] = _ratio(totals['bytes_out'],
+                                     totals['wire_bytes_out'])
+        return totals
+
+    def prometheus(self, prefix='faytheclient'):
+        """Return the metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        operations = sorted(snapshot['operations'].items())
+        lines = []
+
+        def family(name, kind, help):
+            lines.append('# HELP %s_%s %s' % (prefix, name, help))
+            lines.append('# TYPE %s_%s %s' % (prefix, name, kind))
+
+        def sample(name, labels, value):
+            lines.append('%s_%s{%s} %s' % (prefix, name, _labels(labels),
+                                           _number(value)))
+
+        family('requests_total', 'counter', 'Number of requests.')
+        for op, stats in operations:
+            sample('requests_total', [('operation', op)], stats['requests'])
+        family('request_errors_total', 'counter',
+               'Number of failed requests by exception class.')
+        for op, stats in operations:
+            for exc, count in sorted(stats['errors'].items()):
+                sample('request_errors_total',
+                       [('operation', op), ('exception', exc)], count)
+        family('request_bytes_total', 'counter', 'Request body bytes sent.')
+        for op, stats in operations:
+            sample('request_bytes_total', [('operation', op)],
+                   stats['bytes_out'])
+        family('response_bytes_total', 'counter',
+               'Response body bytes received.')
+        for op, stats in operations:
+            sample('response_bytes_total', [('operation', op)],
+                   stats['bytes_in'])
+        family('request_wire_bytes_total', 'counter',
+               'Request body bytes sent over the wire, compressed.')
+        for op, stats in operations:
+            sample('request_wire_bytes_total', [('operation', op)],
+                   stats['wire_bytes_out'])
+        family('response_wire_bytes_total', 'counter',
+               'Response body bytes received over the wire, compressed.')
+        for op, stats in operations:
+            sample('response_wire_bytes_total', [('operation', op)],
+                   stats['wire_bytes_in'])
+        family('request_duration_seconds', 'histogram',
+               'Request latency by phase.')
+        for op, stats in operations:
+            for phase in PHASES:
+                histogram = stats['latency'].get(phase)
+                if histogram is None:
+                    continue
+                labels = [('operation', op), ('phase', phase)]
+                for bound, count in histogram['buckets']:
+                    sample('request_duration_seconds_bucket',
+                           labels + [('le', bound)], count)
+                sample('request_duration_seconds_sum', labels,
+                       histogram['sum'])
+                sample('request_duration_seconds_count', labels,
+                       histogram['count'])
+        family('token_refreshes_total', 'counter', 'Number of jwt logins.')
+        lines.append('%s_token_refreshes_total %d' %
+                     (prefix, snapshot['token_refreshes']))
+        return '\n'.join(lines) + '\n'
+
+
+def _measure_response(sample, response):
+    sample.status_code = response.status_code
+    request = getattr(response, 'request', None)
+    body = getattr(request, 'body', None)
+    if body is not None:
+        sample.wire_bytes_out = len(body)
+        # Set by the HTTPClient on the compressed bodies.
+        sample.bytes_out = getattr(request, 'uncompressed_size',
+                                   sample.wire_bytes_out)
+    elapsed = getattr(response, 'elapsed', None)
+    if elapsed is not None:
+        sample.ttfb = elapsed.total_seconds()
+    # A streamed body is read by the caller, it isn't measured.
+    if getattr(response, '_content_consumed', True):
+        sample.bytes_in = len(response.content or b'')
+        sample.wire_bytes_in = sample.bytes_in
+        raw = getattr(response, 'raw', None)
+        if response.headers.get('Content-Encoding') and \
+                hasattr(raw, 'tell'):
+            # The number of bytes urllib3 read before decoding them.
+            sample.wire_bytes_in = raw.tell()
+        if sample.ttfb is not None:
+            sample.read = max(sample.total - sample.ttfb, 0.0)
+
+
+def _ratio(size, wire_size):
+    return float(size) / wire_size if wire_size else 1.0
+
+
+def _end_span(sample):
+    span = sample.span
+    try:
+        if sample.status_code is not None:
+            span.set_attribute('http.status_code', sample.status_code)
+        if sample.exception is not None:
+            span.record_exception(sample.exception)
+        span.end()
+    except Exception as e:
+        LOG.exception("Unable to end the request span: {}".format(e))
+
+
+def _labels(labels):
+    return ','.join('%s="%s"' % (name, _escape(_number(value)))
+                    for name, value in labels)
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(value)
+    return str(value)
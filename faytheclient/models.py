@@ -0,0 +1,266 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Lightweight models of the Faythe API resources.
+
+The models use __slots__ instead of a per instance dict. Nested
+sections, e.g. `Cloud.auth` or `Scaler.actions`, are kept as received
+and only wrapped into a model when they are first accessed.
+"""
+
+
+class Model(object):
+    """Base class of the Faythe resources.
+
+    Members of the decoded JSON object without a matching field are
+    kept in `extra`, so converting back with :meth:`to_dict` is lossless.
+    """
+
+    __slots__ = ('extra',)
+    # Plain members, stored as is.
+    fields = ()
+    # Nested members, name -> Model class, decoded on first access.
+    sections = {}
+
+    def __init__(self, **kwargs):
+        for name in self.fields:
+            setattr(self, name, kwargs.pop(name, None))
+        for name in self.sections:
+            setattr(self, '_' + name, kwargs.pop(name, None))
+        self.extra = kwargs or None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        data = dict(self.extra or ())
+        for name in self.fields:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        for name in self.sections:
+            value = _dump(getattr(self, '_' + name))
+            if value is not None:
+                data[name] = value
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, self.__class__):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        key = self.fields[0] if self.fields else None
+        return '<%s %s=%r>' % (self.__class__.__name__, key,
+                               getattr(self, key, None))
+
+
+def _dump(value):
+    if isinstance(value, Model):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {k: _dump(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_dump(v) for v in value]
+    return value
+
+
+def _section(name, model, many=None):
+    """A lazily decoded nested section.
+
+    :param many: None for a single object, 'list' for a list of objects
+                 and 'dict' for an object mapping names to objects.
+    """
+    attr = '_' + name
+
+    def getter(self):
+        value = getattr(self, attr)
+        if value is None or isinstance(value, Model):
+            return value
+        if many == 'dict' and isinstance(value, dict):
+            if value and all(isinstance(v, Model)
+                             for v in value.values()):
+                return value
+            value = {k: model.from_dict(v) for k, v in value.items()}
+        elif many == 'list' and isinstance(value, list):
+            if value and all(isinstance(v, Model) for v in value):
+                return value
+            value = [model.from_dict(v) for v in value]
+        elif many is None and isinstance(value, dict):
+            value = model.from_dict(value)
+        setattr(self, attr, value)
+        return value
+
+    def setter(self, value):
+        setattr(self, attr, value)
+
+    return property(getter, setter)
+
+
+class Auth(Model):
+    __slots__ = ('auth_url', 'region_name', 'username', 'password',
+                 'project_name', 'project_id', 'domain_name', 'domain_id')
+    fields = __slots__
+
+
+class Monitor(Model):
+    __slots__ = ('backend', 'address', 'username', 'password',
+                 'metrics_endpoint')
+    fields = __slots__
+
+
+class ATEngine(Model):
+    __slots__ = ('backend', 'address', 'apikey')
+    fields = __slots__
+
+
+class Action(Model):
+    __slots__ = ('type', 'url', 'method', 'attempts', 'delay',
+                 'delay_type')
+    fields = __slots__
+
+
+class Cloud(Model):
+    __slots__ = ('id', 'provider', 'endpoints', 'tags',
+                 '_auth', '_monitor', '_atengine')
+    fields = ('id', 'provider', 'endpoints', 'tags')
+    sections = {'auth': Auth, 'monitor': Monitor, 'atengine': ATEngine}
+
+    auth = _section('auth', Auth)
+    monitor = _section('monitor', Monitor)
+    atengine = _section('atengine', ATEngine)
+
+
+class Scaler(Model):
+    __slots__ = ('id', 'cloudid', 'query', 'duration', 'interval',
+                 'description', 'metadata', 'active', 'cooldown', 'tags',
+                 '_actions')
+    fields = ('id', 'cloudid', 'query', 'duration', 'interval',
+              'description', 'metadata', 'active', 'cooldown', 'tags')
+    sections = {'actions': Action}
+
+    actions = _section('actions', Action, many='dict')
+
+
+class Healer(Model):
+    __slots__ = ('id', 'cloudid', 'query', 'duration', 'interval',
+                 'description', 'evaluation_level', 'receivers', 'active',
+                 'tags', '_actions')
+    fields = ('id', 'cloudid', 'query', 'duration', 'interval',
+              'description', 'evaluation_level', 'receivers', 'active',
+              'tags')
+    sections = {'actions': Action}
+
+    actions = _section('actions', Action, many='dict')
+
+
+class Silence(Model):
+    __slots__ = ('id', 'cloudid', 'name', 'pattern', 'ttl', 'tags',
+                 'description', 'created_at', 'expired_at')
+    fields = __slots__
+
+
+class Policy(Model):
+    """A policy of a user.
+
+    Faythe returns the policies as casbin rows, [user, path, method]. A
+    policy loaded from a row is dumped back to a row by :meth:`to_dict`,
+    the columns after the method included.
+    """
+
+    __slots__ = ('user', 'path', 'method', '_row')
+    fields = ('user', 'path', 'method')
+
+    def __init__(self, **kwargs):
+        # The columns of the row after the method, None if the policy
+        # wasn't loaded from a row.
+        self._row = None
+        super(Policy, self).__init__(**kwargs)
+
+    @classmethod
+    def from_row(cls, row):
+        policy = cls(**dict(zip(cls.fields, row)))
+        policy._row = list(row[len(cls.fields):])
+        return policy
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, (list, tuple)):
+            return cls.from_row(data)
+        return cls(**data)
+
+    def to_row(self):
+        return [getattr(self, name) for name in self.fields] + \
+            list(self._row or ())
+
+    def to_dict(self):
+        if self._row is not None:
+            return self.to_row()
+        return super(Policy, self).to_dict()
+
+
+class User(Model):
+    __slots__ = ('username', 'password', '_policies')
+    fields = ('username', 'password')
+    sections = {'policies': Policy}
+
+    policies = _section('policies', Policy, many='list')
+
+
+class NResolver(Model):
+    __slots__ = ('name', 'address', 'instance')
+    fields = __slots__
+
+
+def load(model, data, many=False):
+    """Convert the data of a decoded response into models.
+
+    :param model: The Model class of the resource.
+    :param data: A decoded response. Its 'data' member is used if it is
+                 an envelope.
+    :param many: If True, data is a listing. An object mapping ids to
+                 resources gives a dict of models and a list gives a
+                 list of models.
+    """
+    if isinstance(data, dict) and 'data' in data and \
+            ('status' in data or len(data) == 1):
+        data = data['data']
+    if many and isinstance(data, dict):
+        return {k: model.from_dict(v) for k, v in data.items()}
+    if many and isinstance(data, list):
+        return [model.from_dict(item) for item in data]
+    if isinstance(data, dict):
+        return model.from_dict(data)
+    return data
+
+
+def iter_load(model, items):
+    """Convert an iterator of decoded resources into models."""
+    for item in items:
+        yield model.from_dict(item) if isinstance(item, dict) else item
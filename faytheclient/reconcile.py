@@ -0,0 +1,317 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Synchronize the scalers, healers and silences with a desired state.
+
+The desired state maps cloud ids to the objects of each kind::
+
+    {
+        '3b8c2d5d64c0e8a1e9f0a5c3d0b5e9a1': {
+            'scalers': [{'query': '...', 'duration': '5m', ...}],
+            'silences': [{'name': 'maintenance', ...}],
+        },
+    }
+
+The objects of a kind are matched with the server ones by their key
+member, see :data:`KEYS`. Only the members present in a desired object
+are compared, through a content hash, so unchanged objects are never
+sent. A kind missing from the document of a cloud is left untouched.
+"""
+
+import hashlib
+import json
+import logging
+
+from faytheclient import batch
+from faytheclient import models
+
+LOG = logging.getLogger(__name__)
+
+KINDS = ('scalers', 'healers', 'silences')
+# Member identifying an object among the objects of its kind in a cloud.
+KEYS = {'scalers': 'query', 'healers': 'query', 'silences': 'name'}
+# Members set by the server, they are never compared.
+SERVER_FIELDS = frozenset(['id', 'cloudid', 'created_at', 'expired_at'])
+
+CREATE = 'create'
+UPDATE = 'update'
+REPLACE = 'replace'
+DELETE = 'delete'
+
+
+def content_hash(obj, fields=None):
+    """Return a stable hash of an object.
+
+    :param obj: A dict.
+    :param fields: (optional) The members to hash, defaults to all of
+                   them but :data:`SERVER_FIELDS`.
+    """
+    if fields is None:
+        fields = obj.keys()
+    data = {k: obj.get(k) for k in fields if k not in SERVER_FIELDS}
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':'),
+                         default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+class Change(object):
+    """A change of a single object.
+
+    :param action: One of 'create', 'update', 'replace' or 'delete'.
+                   Healers and silences can't be updated, they are
+                   replaced, i.e. deleted then created again.
+    :param kind: One of :data:`KINDS`.
+    :param cloud_id: The id of the cloud of the object.
+    :param key: The value of the key member of the object.
+    :param id: The server id of the object, None if it is created.
+    :param body: The desired object, None if it is deleted.
+    """
+
+    __slots__ = ('action', 'kind', 'cloud_id', 'key', 'id', 'body')
+
+    def __init__(self, action, kind, cloud_id, key, id=None, body=None):
+        self.action = action
+        self.kind = kind
+        self.cloud_id = cloud_id
+        self.key = key
+        self.id = id
+        self.body = body
+
+    @property
+    def path(self):
+        # The client methods take the path under the resource url.
+        return '%s/%s' % (self.cloud_id, self.id)
+
+    def to_dict(self):
+        return {'action': self.action, 'kind': self.kind,
+                'cloud_id': self.cloud_id, 'key': self.key, 'id': self.id}
+
+    def __str__(self):
+        return '%-7s %s %s %s=%r' % (self.action, self.cloud_id,
+                                      self.kind[:-1], KEYS[self.kind],
+                                      self.key)
+
+    def __repr__(self):
+        return '<Change %s>' % self
+
+
+class Plan(object):
+    """The changes needed to reach a desired state.
+
+    :param changes: A list of :class:`Change`.
+    :param unchanged: The number of objects already up to date.
+    """
+
+    def __init__(self, changes, unchanged=0):
+        self.changes = changes
+        self.unchanged = unchanged
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def summary(self):
+        counts = dict.fromkeys((CREATE, UPDATE, REPLACE, DELETE), 0)
+        for change in self.changes:
+            counts[change.action] += 1
+        counts['unchanged'] = self.unchanged
+        return counts
+
+    def __str__(self):
+        lines = [str(change) for change in self.changes]
+        lines.append('%(create)d to create, %(update)d to update, '
+                     '%(replace)d to replace, %(delete)d to delete, '
+                     '%(unchanged)d unchanged' % self.summary())
+        return '\n'.join(lines)
+
+
+def listing_items(data):
+    """Return the objects of a decoded listing as a list of dicts.
+
+    :param data: A decoded listing, with or without its envelope, or
+                 the models returned by a client with models enabled.
+    """
+    if isinstance(data, dict) and 'data' in data and \
+            ('status' in data or len(data) == 1):
+        data = data['data']
+    if isinstance(data, dict):
+        data = [dict(v, id=k) if isinstance(v, dict) and 'id' not in v
+                else v for k, v in data.items()]
+    return [item.to_dict() if isinstance(item, models.Model) else item
+            for item in data or ()]
+
+
+def _items(items, cloud_ids):
+    # The healers listing isn't filtered by cloud by the server, it is
+    # split by cloud. A healer without a cloud belongs to none of them.
+    by_cloud = {cloud_id: [] for cloud_id in cloud_ids}
+    for item in items:
+        if item.get('cloudid') in by_cloud:
+            by_cloud[item['cloudid']].append(item)
+    return by_cloud
+
+
+class Reconciler(object):
+    """Compute and apply the changes to reach a desired state.
+
+    :param client: A :class:`faytheclient.client.Client`.
+    :param prune: If True, the server objects missing from the desired
+                  state of a kind are deleted.
+    :param keys: (optional) A dict overriding the :data:`KEYS` members.
+    :param max_workers: (optional) The maximum number of concurrent
+                        requests, defaults to the client max_workers.
+    """
+
+    def __init__(self, client, prune=True, keys=None, max_workers=None):
+        self.client = client
+        self.prune = prune
+        self.keys = dict(KEYS, **(keys or {}))
+        self.max_workers = max_workers or client.max_workers
+
+    def _list(self, kind, cloud_id):
+        method = getattr(self.client, 'list_' + kind)
+        return listing_items(method(cloud_id))
+
+    def fetch(self, desired):
+        """Return the server objects of the kinds in the desired state.
+
+        The healers are listed once for all the clouds.
+
+        :returns: A dict mapping (cloud id, kind) to a list of dicts.
+        """
+        targets = [(cloud_id, kind)
+                   for cloud_id, kinds in desired.items()
+                   for kind in KINDS if kind in kinds and kind != 'healers']
+        healer_clouds = [cloud_id for cloud_id, kinds in desired.items()
+                         if 'healers' in kinds]
+        if healer_clouds:
+            targets.append((None, 'healers'))
+        current = {}
+        for result in batch.fan_out(lambda t: self._list(t[1], t[0]),
+                                    targets, max_workers=self.max_workers):
+            if result.item[1] == 'healers':
+                for cloud_id, items in _items(result.get(),
+                                              healer_clouds).items():
+                    current[(cloud_id, 'healers')] = items
+            else:
+                current[result.item] = result.get()
+        return current
+
+    def _diff(self, kind, cloud_id, wanted, existing):
+        key_name = self.keys[kind]
+        by_key = {}
+        for body in wanted:
+            key = body.get(key_name)
+            if key is None:
+                raise ValueError("A %s of cloud %s has no %r member" %
+                                 (kind[:-1], cloud_id, key_name))
+            if key in by_key:
+                raise ValueError("Duplicated %s %s=%r in cloud %s" %
+                                 (kind[:-1], key_name, key, cloud_id))
+            by_key[key] = body
+
+        changes = []
+        unchanged = 0
+        seen = set()
+        for obj in existing:
+            key = obj.get(key_name)
+            body = by_key.get(key)
+            if body is None or key in seen:
+                if self.prune:
+                    changes.append(Change(DELETE, kind, cloud_id, key,
+                                          id=obj.get('id')))
+                continue
+            seen.add(key)
+            if content_hash(body) == content_hash(obj, body.keys()):
+                unchanged += 1
+                continue
+            action = UPDATE if kind == 'scalers' else REPLACE
+            changes.append(Change(action, kind, cloud_id, key,
+                                  id=obj.get('id'), body=body))
+        for key, body in by_key.items():
+            if key not in seen:
+                changes.append(Change(CREATE, kind, cloud_id, key,
+                                      body=body))
+        return changes, unchanged
+
+    def plan(self, desired, current=None):
+        """Return the :class:`Plan` to reach a desired state.
+
+        :param desired: The desired state document.
+        :param current: (optional) The server objects as returned by
+                        :meth:`fetch`, they are fetched if omitted.
+        """
+        if current is None:
+            current = self.fetch(desired)
+        changes = []
+        unchanged = 0
+        for cloud_id, kinds in desired.items():
+            for kind in KINDS:
+                if kind not in kinds:
+                    continue
+                kind_changes, kind_unchanged = self._diff(
+                    kind, cloud_id, kinds[kind] or (),
+                    current.get((cloud_id, kind), ()))
+                changes.extend(kind_changes)
+                unchanged += kind_unchanged
+        return Plan(changes, unchanged)
+
+    def _apply_change(self, change):
+        client = self.client
+        kind = change.kind
+        if change.action == UPDATE:
+            return client.update_scaler(change.path, change.body)
+        if change.action in (DELETE, REPLACE):
+            if kind == 'scalers':
+                result = client.delete_scaler(change.path)
+            elif kind == 'healers':
+                result = client.delete_healers(change.path)
+            else:
+                result = client.delete_silence(change.path)
+            if change.action == DELETE:
+                return result
+        create = getattr(client, 'create_' + kind[:-1])
+        return create(change.cloud_id, change.body)
+
+    def apply(self, plan, ordered=False):
+        """Apply the changes of a plan concurrently.
+
+        :param plan: A :class:`Plan`.
+        :param ordered: (optional) If True, results are returned in the
+                        plan order instead of as soon as they complete.
+        :returns: An iterator of :class:`faytheclient.batch.Result`,
+                  their item is the :class:`Change`.
+        """
+        LOG.debug("Applying %d changes" % len(plan))
+        return batch.fan_out(self._apply_change, plan.changes,
+                             max_workers=self.max_workers, ordered=ordered)
+
+    def sync(self, desired, dry_run=False):
+        """Plan and apply the changes to reach a desired state.
+
+        :returns: The plan and, unless dry_run is True, the list of
+                  results of :meth:`apply`.
+        """
+        plan = self.plan(desired)
+        if dry_run:
+            return plan, []
+        return plan, list(self.apply(plan))
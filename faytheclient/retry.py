@@ -0,0 +1,186 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Retries with backoff and a circuit breaker for the HTTPClient.
+
+Unlike the transport retries of :func:`faytheclient.http.create_session`,
+they are bounded by the deadline of the call and the circuit breaker
+of the endpoint.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from faytheclient import exceptions
+
+LOG = logging.getLogger(__name__)
+
+# Methods retried by default, replaying them has no side effect.
+IDEMPOTENT_METHODS = frozenset(['DELETE', 'GET', 'HEAD', 'OPTIONS', 'PUT'])
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def _status_code(exception):
+    response = getattr(exception, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def is_server_failure(exception):
+    """Return True if an exception shows the server is unavailable.
+
+    Client errors, e.g. a 404, are not failures of the server.
+    """
+    if isinstance(exception, exceptions.CircuitOpen):
+        return False
+    status_code = _status_code(exception)
+    if status_code is not None:
+        return status_code in RETRY_STATUSES or status_code >= 500
+    return isinstance(exception, (exceptions.CommunicationError,
+                                  exceptions.InvalidEndpoint))
+
+
+class RetryPolicy(object):
+    """When and how long to wait before retrying a request.
+
+    :param attempts: The maximum number of attempts, including the
+                     first one.
+    :param backoff: The base delay, it doubles at every attempt.
+    :param max_backoff: The highest delay between two attempts.
+    :param jitter: If True, the delay is picked at random between 0 and
+                   the exponential delay ("full jitter"), so clients
+                   failing together don't retry together.
+    :param methods: The retried methods, add 'POST' to retry the
+                    creations, they may then be applied twice.
+    :param statuses: The retried response statuses.
+    """
+
+    def __init__(self, attempts=3, backoff=0.5, max_backoff=30,
+                 jitter=True, methods=IDEMPOTENT_METHODS,
+                 statuses=RETRY_STATUSES):
+        self.attempts = max(int(attempts), 1)
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self.jitter = jitter
+        self.methods = frozenset(m.upper() for m in methods)
+        self.statuses = frozenset(statuses)
+
+    def is_retryable(self, method, exception):
+        if method not in self.methods:
+            return False
+        if isinstance(exception, exceptions.CircuitOpen):
+            return False
+        status_code = _status_code(exception)
+        if status_code is not None:
+            return status_code in self.statuses
+        return isinstance(exception, (exceptions.CommunicationError,
+                                      exceptions.InvalidEndpoint))
+
+    def delay(self, attempt, exception=None):
+        """Return the seconds to wait after a failed attempt.
+
+        :param attempt: The number of the failed attempt, from 1.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        response = getattr(exception, 'response', None)
+        try:
+            retry_after = float(response.headers.get('Retry-After'))
+        except (AttributeError, TypeError, ValueError):
+            return delay
+        return max(delay, min(retry_after, self.max_backoff))
+
+
+class CircuitBreaker(object):
+    """Fail fast while an endpoint is down.
+
+    After `failure_threshold` consecutive server failures the circuit
+    opens and the requests fail with
+    :class:`faytheclient.exceptions.CircuitOpen` without being sent.
+    After `reset_timeout` seconds a single request is let through, its
+    success closes the circuit and its failure opens it again.
+
+    :param failure_threshold: The number of consecutive failures
+                              opening the circuit.
+    :param reset_timeout: The number of seconds the circuit stays open.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_timeout = float(reset_timeout)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise CircuitOpen unless a request may be sent."""
+        if self.state == self.CLOSED:
+            return
+        with self._lock:
+            if self.state == self.OPEN and \
+                    time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let this request probe the endpoint.
+                self.state = self.HALF_OPEN
+                return
+        if self.state != self.CLOSED:
+            raise exceptions.CircuitOpen(
+                message="The circuit is %s after %d failures" %
+                (self.state, self.failures))
+
+    def record_success(self):
+        if self.state == self.CLOSED and not self.failures:
+            return
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or \
+                    self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    LOG.warning("Opening the circuit after %d failures" %
+                                self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+def get_circuit_breaker(endpoint, **kwargs):
+    """Return the circuit breaker shared by the clients of an endpoint.
+
+    The options are only used by the first call for an endpoint.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(**kwargs)
+        return breaker
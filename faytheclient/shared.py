@@ -0,0 +1,333 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""A jwt and a response cache shared by the processes of a host.
+
+The pre-fork workers of a web server each create their own client,
+given the same :class:`SharedStore` file they log in once for all of
+them and share the cached listings::
+
+    client.Client(endpoint, username, password, cache=True,
+                  shared_store='/dev/shm/faytheclient.sqlite')
+
+The store is a SQLite database, put it on a local file system, ideally
+in memory. It is opened again in a forked process.
+
+The store holds bearer jwts: the database and its lock file are created
+readable by their owner only, mode 0600. Use a path no other user can
+create first, e.g. in a directory of the service user, an existing
+file keeps its mode.
+"""
+
+import contextlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from faytheclient import cache as response_cache
+from faytheclient import codec as json_codec
+
+try:
+    import fcntl
+except ImportError:
+    # Not on POSIX, the processes may then log in concurrently.
+    fcntl = None
+
+LOG = logging.getLogger(__name__)
+
+# The mode of the files of the store, the jwts must not be readable by
+# the other users. SQLite gives its WAL files the mode of the database.
+FILE_MODE = 0o600
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS tokens ('
+    ' key TEXT PRIMARY KEY, token TEXT NOT NULL,'
+    ' expires_at REAL NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS responses ('
+    ' namespace TEXT NOT NULL, key TEXT NOT NULL, path TEXT NOT NULL,'
+    ' value BLOB NOT NULL, etag TEXT, last_modified TEXT,'
+    ' expires_at REAL NOT NULL, stored_at REAL NOT NULL,'
+    ' PRIMARY KEY (namespace, key))',
+    'CREATE TABLE IF NOT EXISTS meta ('
+    ' name TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+)
+
+
+def _open_private(path):
+    """Open a file for reading and writing, creating it with
+    FILE_MODE. Return its descriptor.
+    """
+    return os.open(path, os.O_CREAT | os.O_RDWR, FILE_MODE)
+
+
+class SharedStore(object):
+    """A SQLite file holding the jwts and the cached responses.
+
+    :param path: The database file, created if it doesn't exist.
+    :param timeout: The number of seconds to wait for a lock held by
+                    another process.
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = float(timeout)
+        self._pid = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Called with the lock held. A connection can't be used by a
+        # forked process, every process opens its own.
+        if self._pid != os.getpid():
+            # Created here, sqlite3 would use the umask.
+            os.close(_open_private(self.path))
+            self._conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+            self._pid = os.getpid()
+        return self._conn
+
+    @contextlib.contextmanager
+    def cursor(self, write=False):
+        """Run statements in a transaction, serialized in the process."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    @contextlib.contextmanager
+    def lock(self):
+        """Hold an exclusive lock between the processes, e.g. to log in
+        once for all of them.
+        """
+        if fcntl is None:
+            yield
+            return
+        fd = _open_private(self.path + '.lock')
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def get_token(self, key):
+        """Return the (token, expires_at) stored for a key, or None."""
+        with self.cursor() as conn:
+            row = conn.execute('SELECT token, expires_at FROM tokens '
+                               'WHERE key = ?', (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def set_token(self, key, token, expires_at):
+        with self.cursor(write=True) as conn:
+            conn.execute('INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)',
+                         (key, token, expires_at))
+
+    def delete_token(self, key, token):
+        """Forget a rejected token, unless it was already replaced."""
+        with self.cursor(write=True) as conn:
+            conn.execute('DELETE FROM tokens WHERE key = ? AND token = ?',
+                         (key, token))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._pid = None
+
+
+def get_store(store):
+    """Return a SharedStore given one or the path of its file."""
+    if isinstance(store, SharedStore):
+        return store
+    return SharedStore(store)
+
+
+class SharedResponseCache(object):
+    """A :class:`faytheclient.cache.ResponseCache` kept in a
+    :class:`SharedStore`.
+
+    A listing decoded by a process is reused by the next lookups of the
+    same process until another one stores a newer version.
+
+    :param store: A :class:`SharedStore`.
+    :param namespace: The responses of the clients with the same
+                      namespace, i.e. endpoint and user, are shared.
+    :param maxsize: The maximum number of cached responses of the
+                    namespace.
+    :param ttl: The number of seconds a response is served without
+                asking the server.
+    :param codec: (optional) The codec the responses are stored with.
+    """
+
+    def __init__(self, store, namespace='', maxsize=256, ttl=5,
+                 codec=None):
+        self.backend = store
+        self.namespace = namespace
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl)
+        self.codec = codec or json_codec.get_codec()
+        # The counters are the ones of this process.
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.invalidations = 0
+        # key: (stored_at, value) of the responses decoded here.
+        self._decoded = {}
+
+    def __len__(self):
+        with self.backend.cursor() as conn:
+            return conn.execute('SELECT COUNT(*) FROM responses '
+                                'WHERE namespace = ?',
+                                (self.namespace,)).fetchone()[0]
+
+    @property
+    def generation(self):
+        with self.backend.cursor() as conn:
+            row = conn.execute("SELECT value FROM meta "
+                               "WHERE name = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _key(key):
+        return '%s %s' % key
+
+    def lookup(self, key):
+        """Return the entry of a key, fresh or not, or None."""
+        skey = self._key(key)
+        with self.backend.cursor() as conn:
+            row = conn.execute(
+                'SELECT stored_at, expires_at, etag, last_modified '
+                'FROM responses WHERE namespace = ? AND key = ?',
+                (self.namespace, skey)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            stored_at, expires_at, etag, last_modified = row
+            decoded = self._decoded.get(skey)
+            if decoded is None or decoded[0] != stored_at:
+                blob = conn.execute(
+                    'SELECT value FROM responses '
+                    'WHERE namespace = ? AND key = ?',
+                    (self.namespace, skey)).fetchone()[0]
+                decoded = None
+        entry = response_cache.Entry(None, expires_at, etag, last_modified)
+        if entry.fresh:
+            self.hits += 1
+        elif etag is None and last_modified is None:
+            # Nothing to revalidate it with.
+            self.misses += 1
+            return None
+        if decoded is None:
+            if len(self._decoded) >= self.maxsize:
+                self._decoded.clear()
+            decoded = (stored_at, self.codec.loads(blob))
+            self._decoded[skey] = decoded
+        entry.value = decoded[1]
+        return entry
+
+    def store(self, key, value, etag=None, last_modified=None,
+              generation=None):
+        skey = self._key(key)
+        stored_at = time.time()
+        blob = self.codec.dumps(value)
+        with self.backend.cursor(write=True) as conn:
+            row = conn.execute("SELECT value FROM meta "
+                               "WHERE name = 'generation'").fetchone()
+            if generation is not None and generation != (row[0] if row
+                                                          else 0):
+                return
+            conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES '
+                '(?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.namespace, skey, key[1].split('?', 1)[0],
+                 sqlite3.Binary(blob), etag, last_modified,
+                 stored_at + self.ttl, stored_at))
+            conn.execute(
+                'DELETE FROM responses WHERE namespace = ? AND key NOT IN '
+                '(SELECT key FROM responses WHERE namespace = ? '
+                ' ORDER BY stored_at DESC LIMIT ?)',
+                (self.namespace, self.namespace, self.maxsize))
+        self._decoded[skey] = (stored_at, value)
+
+    def revalidate(self, key, entry):
+        """Mark an entry confirmed by a 304 response as fresh again."""
+        self.revalidations += 1
+        entry.expires_at = time.time() + self.ttl
+        with self.backend.cursor(write=True) as conn:
+            conn.execute('UPDATE responses SET expires_at = ? '
+                         'WHERE namespace = ? AND key = ?',
+                         (entry.expires_at, self.namespace,
+                          self._key(key)))
+
+    def record_miss(self):
+        """Count a revalidation the server answered with a new body."""
+        self.misses += 1
+
+    def invalidate(self, url):
+        """Drop the cached listings depending on a modified url, in
+        every namespace.
+        """
+        paths = response_cache.dependent_paths(url)
+        if not paths:
+            return
+        with self.backend.cursor(write=True) as conn:
+            conn.execute("INSERT OR IGNORE INTO meta "
+                         "VALUES ('generation', 0)")
+            conn.execute("UPDATE meta SET value = value + 1 "
+                         "WHERE name = 'generation'")
+            for path in paths:
+                deleted = conn.execute(
+                    'DELETE FROM responses WHERE path = ? OR '
+                    'substr(path, 1, ?) = ?',
+                    (path, len(path) + 1, path + '/')).rowcount
+                self.invalidations += max(deleted, 0)
+
+    def clear(self):
+        with self.backend.cursor(write=True) as conn:
+            conn.execute("INSERT OR IGNORE INTO meta "
+                         "VALUES ('generation', 0)")
+            conn.execute("UPDATE meta SET value = value + 1 "
+                         "WHERE name = 'generation'")
+            conn.execute('DELETE FROM responses WHERE namespace = ?',
+                         (self.namespace,))
+        self._decoded.clear()
+
+    def stats(self):
+        return {
+            'size': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'invalidations': self.invalidations,
+        }
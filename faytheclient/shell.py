@@ -0,0 +1,420 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""The faythe command line tool.
+
+Export the objects of a Faythe installation to JSON Lines, then import
+them into another one::
+
+    faythe export -o backup.jsonl.gz
+    faythe --endpoint http://new-faythe:8600 import -i backup.jsonl.gz
+
+Every line is a record, e.g.::
+
+    {"kind":"scalers","cloud_id":"3b8c...","data":{"query":"..."}}
+
+The records are streamed: neither command holds a whole installation
+in memory. The requests are sent by a pool of workers. The input is
+read once per stage, see :data:`STAGES`, a pipe is first copied to a
+temporary file.
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from faytheclient import batch
+from faytheclient import client as faythe_client
+from faytheclient import models
+from faytheclient import reconcile
+
+LOG = logging.getLogger(__name__)
+
+KINDS = ('clouds', 'scalers', 'healers', 'silences', 'users', 'policies')
+CLOUD_KINDS = ('scalers', 'healers', 'silences')
+# The records of a stage are imported once those of the previous ones
+# are: the clouds before their objects, the users before their policies.
+STAGES = {'clouds': 0, 'users': 0, 'scalers': 1, 'healers': 1,
+          'silences': 1, 'policies': 1}
+
+
+class Progress(object):
+    """Report the number of processed records on stderr.
+
+    :param action: The verb of the report, e.g. 'exported'.
+    :param enabled: If False, nothing is reported.
+    :param interval: The minimum number of seconds between reports.
+    """
+
+    def __init__(self, action, enabled=True, interval=0.5, stream=None):
+        self.action = action
+        self.enabled = enabled
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+        self._reported_at = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, done=1, failed=0):
+        with self._lock:
+            self.done += done
+            self.failed += failed
+            now = time.monotonic()
+            if self.enabled and now - self._reported_at >= self.interval:
+                self._reported_at = now
+                self._report(now, '\r')
+
+    def finish(self):
+        with self._lock:
+            if self.enabled:
+                self._report(time.monotonic(), '\n')
+
+    def _report(self, now, end):
+        elapsed = max(now - self.started_at, 1e-6)
+        self.stream.write('%s %d records, %d failed in %.1fs '
+                          '(%.0f records/s)%s' %
+                          (self.action, self.done, self.failed, elapsed,
+                           self.done / elapsed, end))
+        self.stream.flush()
+
+
+class RecordWriter(object):
+    """Write records as JSON Lines, from several threads."""
+
+    def __init__(self, stream, codec, progress):
+        self.stream = stream
+        self.codec = codec
+        self.progress = progress
+        self._lock = threading.Lock()
+
+    def write(self, kind, data, **members):
+        record = {'kind': kind}
+        record.update(members)
+        record['data'] = data
+        line = self.codec.dumps(record) + b'\n'
+        with self._lock:
+            self.stream.write(line)
+        self.progress.update()
+
+
+def _open(path, mode):
+    # '-' is stdin or stdout, gzip is used for the .gz files.
+    if path == '-':
+        stream = sys.stdin if 'r' in mode else sys.stdout
+        return stream.buffer
+    if path.endswith('.gz'):
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+def _policy(policy):
+    """Return a policy as add_policies takes it, from a casbin row as
+    Faythe lists them or from a dict.
+    """
+    if isinstance(policy, (list, tuple)):
+        policy = models.Policy.from_row(policy)
+    if isinstance(policy, models.Policy):
+        return {'path': policy.path, 'method': policy.method}
+    return policy
+
+
+def _export_target(client, writer, kinds, kind, cloud_id):
+    if kind == 'scalers':
+        for scaler in client.iter_scalers(cloud_id):
+            writer.write(kind, scaler, cloud_id=cloud_id)
+    elif kind == 'silences':
+        for silence in client.iter_silences(cloud_id):
+            writer.write(kind, silence, cloud_id=cloud_id)
+    elif kind == 'healers':
+        # The healers listing isn't filtered by cloud by the server.
+        orphans = 0
+        for healer in reconcile.listing_items(client.list_healers(None)):
+            if healer.get('cloudid') in cloud_id:
+                writer.write(kind, healer, cloud_id=healer['cloudid'])
+            else:
+                orphans += 1
+        if orphans:
+            # They couldn't be imported without their cloud.
+            raise ValueError("%d healers have no known cloud, they were "
+                             "not exported" % orphans)
+    else:
+        for user in reconcile.listing_items(client.list_users()):
+            user = dict(user)
+            policies = user.pop('policies', None)
+            # The server never returns the passwords in clear.
+            user.pop('password', None)
+            if 'users' in kinds:
+                writer.write('users', user)
+            if policies and 'policies' in kinds:
+                writer.write('policies',
+                             [_policy(policy) for policy in policies],
+                             username=user['username'])
+
+
+def export_records(client, stream, kinds=KINDS, max_workers=10,
+                   progress=None):
+    """Write the objects of an installation to a binary stream.
+
+    The clouds are listed first, then the objects of every cloud are
+    listed concurrently.
+
+    :returns: The list of the :class:`faytheclient.batch.Result` which
+              failed, their item is a (kind, cloud id) tuple.
+    """
+    progress = progress or Progress('exported', enabled=False)
+    writer = RecordWriter(stream, client.codec, progress)
+    cloud_ids = []
+    if any(kind in kinds for kind in ('clouds',) + CLOUD_KINDS):
+        for cloud in client.iter_clouds():
+            cloud_ids.append(cloud['id'])
+            if 'clouds' in kinds:
+                writer.write('clouds', cloud)
+    targets = [(kind, cloud_id) for cloud_id in cloud_ids
+               for kind in ('scalers', 'silences') if kind in kinds]
+    if 'healers' in kinds:
+        targets.append(('healers', frozenset(cloud_ids)))
+    if 'users' in kinds or 'policies' in kinds:
+        targets.append(('users', None))
+    failures = []
+    for result in batch.imap_unordered(
+            lambda target: _export_target(client, writer, kinds, *target),
+            targets, max_workers=max_workers):
+        if not result.ok:
+            progress.update(0, 1)
+            failures.append(result)
+    progress.finish()
+    return failures
+
+
+def _body(data):
+    if not isinstance(data, dict):
+        return data
+    return {k: v for k, v in data.items()
+            if k not in reconcile.SERVER_FIELDS}
+
+
+def import_record(client, record, password=None):
+    """Create the object of an exported record.
+
+    :param password: (optional) The password of the imported users,
+                     their records have none.
+    """
+    kind = record.get('kind')
+    data = record.get('data')
+    if kind == 'clouds':
+        return client.register_cloud(data['provider'], _body(data))
+    if kind in CLOUD_KINDS:
+        create = getattr(client, 'create_' + kind[:-1])
+        return create(record['cloud_id'], _body(data))
+    if kind == 'users':
+        user = dict(data)
+        if password is not None:
+            user.setdefault('password', password)
+        if not user.get('password'):
+            raise ValueError("The user %s has no password, set one with "
+                             "--user-password" % user.get('username'))
+        return client.create_user(user)
+    if kind == 'policies':
+        return client.add_policies(record['username'],
+                                   [_policy(policy) for policy in data])
+    raise ValueError("Unknown record kind %r" % kind)
+
+
+def _iter_records(stream, codec):
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = codec.loads(line)
+        except ValueError as e:
+            raise ValueError("Invalid record on line %d: %s" % (number, e))
+        record['line'] = number
+        yield record
+
+
+def _spool(stream):
+    """Return a seekable copy of a stream, or the stream itself."""
+    if stream.seekable():
+        return stream
+    spool = tempfile.TemporaryFile()
+    shutil.copyfileobj(stream, spool)
+    spool.seek(0)
+    return spool
+
+
+def import_records(client, stream, kinds=KINDS, max_workers=10,
+                   progress=None, password=None):
+    """Create the objects of the records read from a binary stream.
+
+    The stream is read once per stage, see :data:`STAGES`: the records
+    of a stage are created concurrently once the previous stage is
+    done, wherever they are in the stream. A stream which isn't
+    seekable is copied to a temporary file.
+
+    :returns: The list of the :class:`faytheclient.batch.Result` which
+              failed, their item is the record.
+    """
+    progress = progress or Progress('imported', enabled=False)
+    spool = _spool(stream)
+    start = spool.tell()
+    failures = []
+    try:
+        for stage in sorted(set(STAGES.get(kind, 0) for kind in kinds)):
+            spool.seek(start)
+            records = (
+                record for record in _iter_records(spool, client.codec)
+                if record.get('kind') in kinds and
+                STAGES.get(record.get('kind'), 0) == stage)
+            for result in batch.imap_unordered(
+                    lambda record: import_record(client, record, password),
+                    records, max_workers=max_workers):
+                if result.ok:
+                    progress.update()
+                else:
+                    progress.update(0, 1)
+                    failures.append(result)
+    finally:
+        if spool is not stream:
+            spool.close()
+    progress.finish()
+    return failures
+
+
+def _kinds(value):
+    kinds = tuple(k.strip() for k in value.split(',') if k.strip())
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            "unknown kinds %s, expecting some of %s" %
+            (', '.join(sorted(unknown)), ','.join(KINDS)))
+    return kinds
+
+
+def do_export(client, args):
+    with _open(args.output, 'wb') as stream:
+        failures = export_records(
+            client, stream, kinds=args.kinds, max_workers=args.workers,
+            progress=Progress('exported', enabled=not args.quiet))
+    for result in failures:
+        kind, cloud_id = result.item
+        target = kind if cloud_id is None or kind == 'healers' else \
+            '%s of cloud %s' % (kind, cloud_id)
+        sys.stderr.write('Failed to export the %s: %s\n' %
+                         (target, result.exception))
+    return 1 if failures else 0
+
+
+def do_import(client, args):
+    with _open(args.input, 'rb') as stream:
+        failures = import_records(
+            client, stream, kinds=args.kinds, max_workers=args.workers,
+            progress=Progress('imported', enabled=not args.quiet),
+            password=args.user_password)
+    for result in failures:
+        sys.stderr.write('Failed to import the %s record on line %d: %s\n'
+                         % (result.item.get('kind'), result.item['line'],
+                            result.exception))
+    return 1 if failures else 0
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='faythe', description='Faythe command line tool.')
+    parser.add_argument('--endpoint',
+                        default=os.environ.get('FAYTHE_ENDPOINT'),
+                        help='the Faythe endpoint, or a comma separated '
+                             'list of replicas [env: FAYTHE_ENDPOINT]')
+    parser.add_argument('--username',
+                        default=os.environ.get('FAYTHE_USERNAME'),
+                        help='[env: FAYTHE_USERNAME]')
+    parser.add_argument('--password',
+                        default=os.environ.get('FAYTHE_PASSWORD'),
+                        help='[env: FAYTHE_PASSWORD]')
+    parser.add_argument('--workers', type=int, default=10,
+                        help='the number of concurrent requests')
+    parser.add_argument('--timeout', type=float, default=60,
+                        help='the requests timeout in seconds')
+    parser.add_argument('--quiet', action='store_true',
+                        help='do not report the progress')
+    parser.add_argument('--debug', action='store_true')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    export = subparsers.add_parser(
+        'export', help='export the objects to JSON Lines')
+    export.add_argument('-o', '--output', default='-',
+                        help='the output file, gzipped if it ends with '
+                             '.gz, defaults to stdout')
+    export.add_argument('--kinds', type=_kinds, default=KINDS,
+                        help='a comma separated list of the kinds to '
+                             'export, defaults to %s' % ','.join(KINDS))
+    export.set_defaults(func=do_export)
+
+    import_ = subparsers.add_parser(
+        'import', help='import the objects of an export')
+    import_.add_argument('-i', '--input', default='-',
+                         help='the input file, gzipped if it ends with '
+                              '.gz, defaults to stdin')
+    import_.add_argument('--kinds', type=_kinds, default=KINDS,
+                         help='a comma separated list of the kinds to '
+                              'import, defaults to all of them')
+    import_.add_argument('--user-password',
+                         help='the password of the imported users')
+    import_.set_defaults(func=do_import)
+    return parser
+
+
+def main(argv=None):
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.CRITICAL)
+    for option in ('endpoint', 'username', 'password'):
+        if not getattr(args, option):
+            parser.error('--%s or FAYTHE_%s is required' %
+                         (option, option.upper()))
+    endpoints = [e.strip() for e in args.endpoint.split(',') if e.strip()]
+    try:
+        client = faythe_client.Client(
+            endpoints if len(endpoints) > 1 else endpoints[0],
+            args.username, args.password, max_workers=args.workers,
+            pool_maxsize=args.workers, timeout=args.timeout)
+    except Exception as e:
+        sys.stderr.write('Unable to log into Faythe: %s\n' % e)
+        return 1
+    try:
+        return args.func(client, args)
+    except (IOError, ValueError) as e:
+        sys.stderr.write('%s\n' % e)
+        return 1
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import codecs
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _Buffer(object):
+    """Text read incrementally from an iterator of byte chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size):
+        # Read at least size more characters, unless the body ends.
+        wanted = len(self.text) + size
+        parts = [self.text[self.pos:]]
+        length = len(parts[0])
+        while length < wanted - self.pos and not self.eof:
+            try:
+                chunk = next(self.chunks)
+            except StopIteration:
+                self.eof = True
+                chunk = self.decoder.decode(b'', final=True)
+            else:
+                chunk = self.decoder.decode(chunk)
+            parts.append(chunk)
+            length += len(chunk)
+        self.text = ''.join(parts)
+        self.pos = 0
+
+    def peek(self):
+        """Return the next non whitespace character, or '' at the end."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if self.eof:
+                return ''
+            self._fill(CHUNK_SIZE)
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError("Expecting one of %r at offset %d, got %r" %
+                             (chars, self.pos, char))
+        self.pos += 1
+        return char
+
+    def decode(self):
+        """Decode the next JSON value, reading as much as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.text, self.pos)
+            except ValueError:
+                if self.eof:
+                    raise
+            else:
+                # A number at the end of the buffer may be truncated.
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            # Grow geometrically to avoid decoding a big value too often.
+            self._fill(max(CHUNK_SIZE, len(self.text) - self.pos))
+
+    def compact(self):
+        # Drop the consumed text so memory is bounded by one item.
+        if self.pos > CHUNK_SIZE:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+
+
+def _iter_container(buf):
+    opening = buf.expect('[{')
+    closing = ']' if opening == '[' else '}'
+    if buf.peek() == closing:
+        buf.pos += 1
+        return
+    while True:
+        if opening == '{':
+            buf.decode()  # the key
+            buf.expect(':')
+        yield buf.decode()
+        buf.compact()
+        if buf.expect(',' + closing) == closing:
+            return
+
+
+def iter_items(chunks, key='data'):
+    """Yield the items of a JSON response one at a time.
+
+    The items are the elements of the array, or the values of the
+    object, found under `key` in the top level object, or the elements
+    of a top level array. Only one item is decoded at a time.
+
+    :param chunks: An iterator of bytes, e.g. `response.iter_content()`.
+    :param key: The top level member holding the items.
+    """
+    buf = _Buffer(chunks)
+    if buf.peek() == '[':
+        for item in _iter_container(buf):
+            yield item
+        return
+
+    buf.expect('{')
+    if buf.peek() == '}':
+        return
+    while True:
+        name = buf.decode()
+        buf.expect(':')
+        if name == key and buf.peek() in ('[', '{'):
+            for item in _iter_container(buf):
+                yield item
+        else:
+            buf.decode()
+        buf.compact()
+        if buf.expect(',}') == '}':
+            return
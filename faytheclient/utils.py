@@ -18,20 +18,49 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import functools
+from urllib import parse
 
-def generate_url(url, *args, **kwargs):
-    """Generate an url with input arguments.
+# Characters kept as is in the path parameters, '/' lets a parameter
+# hold several segments, e.g. '<cloud id>/<scaler id>'.
+PATH_SAFE = '/'
+# Separator of the values of a list filter, e.g. tags=a,b.
+LIST_SEPARATOR = ','
 
-    *args -> path parameter.
-    *kwargs -> query parameter.
-    """
+
+def _query_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (set, frozenset)):
+        value = sorted(value)
+    if isinstance(value, (list, tuple)):
+        return LIST_SEPARATOR.join(str(v) for v in value)
+    return str(value)
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_url(url, args, query):
     url = url.rstrip('/')
     if args:
-        url = '/'.join([url, *args])
-    if kwargs:
-        for k, v in kwargs.items():
-            if k == list(kwargs.keys())[0]:
-                url += "?{}={}" . format(k, v)
-                continue
-            url += "&{}={}" . format(k, v)
+        url = '/'.join([url] + [parse.quote(str(a), safe=PATH_SAFE)
+                                for a in args])
+    if query:
+        url += '?' + parse.urlencode(query, safe=LIST_SEPARATOR)
     return url
+
+
+def generate_url(url, *args, **kwargs):
+    """Generate an url with input arguments.
+
+    *args -> path parameter, percent-encoded.
+    *kwargs -> query parameter, percent-encoded. Lists are sent comma
+               separated and None values are left out.
+
+    The urls are memoized, so the hot listing calls don't build them
+    again.
+    """
+    if not kwargs:
+        return _build_url(url, args, ())
+    query = tuple([(k, _query_value(v)) for k, v in kwargs.items()
+                   if v is not None])
+    return _build_url(url, args, query)
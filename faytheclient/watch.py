@@ -0,0 +1,314 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""A local mirror of the Faythe objects refreshed by polling.
+
+A :class:`Watcher` polls the clouds and their scalers, healers and
+silences, and keeps them in an indexed :class:`Snapshot`. Subscribers
+are only notified of the objects which were added, updated or removed
+since the previous poll.
+
+The ids of the scalers, healers and silences are only unique within
+their cloud: these objects are keyed by a (cloud id, id) tuple, the
+clouds by their id, see :func:`object_key`.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from faytheclient import batch
+from faytheclient import reconcile
+
+LOG = logging.getLogger(__name__)
+
+KINDS = ('clouds', 'scalers', 'healers', 'silences')
+ADDED = 'added'
+UPDATED = 'updated'
+REMOVED = 'removed'
+
+
+class Event(object):
+    """A change of an object between two polls.
+
+    :param type: One of 'added', 'updated' or 'removed'.
+    :param kind: One of :data:`KINDS`.
+    :param obj: The object, or the last known one if it was removed.
+    :param previous: The object before an update.
+    """
+
+    __slots__ = ('type', 'kind', 'obj', 'previous')
+
+    def __init__(self, type, kind, obj, previous=None):
+        self.type = type
+        self.kind = kind
+        self.obj = obj
+        self.previous = previous
+
+    @property
+    def id(self):
+        return self.obj.get('id')
+
+    @property
+    def key(self):
+        """The key of the object in a :class:`Snapshot`."""
+        return object_key(self.kind, self.obj)
+
+    @property
+    def cloud_id(self):
+        return _cloud_id(self.kind, self.obj)
+
+    def __repr__(self):
+        return '<Event %s %s %s>' % (self.type, self.kind[:-1], self.id)
+
+
+def _cloud_id(kind, obj):
+    if kind == 'clouds':
+        return obj.get('id')
+    return obj.get('cloudid')
+
+
+def object_key(kind, obj):
+    """Return the key of an object: its id for a cloud, else a
+    (cloud id, id) tuple.
+    """
+    if kind == 'clouds':
+        return obj.get('id')
+    return (obj.get('cloudid'), obj.get('id'))
+
+
+class Snapshot(object):
+    """An immutable set of objects indexed by key, cloud and tag.
+
+    The objects are the dicts decoded from the listings, they are
+    shared and must not be modified.
+
+    :param objects: A dict mapping every kind to a dict of objects by
+                    key, see :func:`object_key`.
+    """
+
+    def __init__(self, objects=None):
+        self.objects = {kind: {} for kind in KINDS}
+        self.hashes = {kind: {} for kind in KINDS}
+        self._by_cloud = {kind: {} for kind in KINDS}
+        self._by_tag = {kind: {} for kind in KINDS}
+        for kind, items in (objects or {}).items():
+            for key, obj in items.items():
+                self._add(kind, key, obj)
+
+    def _add(self, kind, key, obj):
+        self.objects[kind][key] = obj
+        self.hashes[kind][key] = reconcile.content_hash(obj)
+        cloud_id = _cloud_id(kind, obj)
+        if cloud_id is not None:
+            self._by_cloud[kind].setdefault(cloud_id, []).append(key)
+        for tag in obj.get('tags') or ():
+            self._by_tag[kind].setdefault(tag, []).append(key)
+
+    def __len__(self):
+        return sum(len(items) for items in self.objects.values())
+
+    def get(self, kind, key):
+        """Return an object by key, see :func:`object_key`."""
+        return self.objects[kind].get(key)
+
+    def all(self, kind):
+        return list(self.objects[kind].values())
+
+    def by_cloud(self, kind, cloud_id):
+        objects = self.objects[kind]
+        return [objects[key]
+                for key in self._by_cloud[kind].get(cloud_id, ())]
+
+    def by_tag(self, kind, tag):
+        objects = self.objects[kind]
+        return [objects[key] for key in self._by_tag[kind].get(tag, ())]
+
+    def diff(self, other):
+        """Return the events turning this snapshot into another one."""
+        events = []
+        for kind in KINDS:
+            old, new = self.objects[kind], other.objects[kind]
+            old_hashes, new_hashes = self.hashes[kind], other.hashes[kind]
+            for key, obj in new.items():
+                if key not in old:
+                    events.append(Event(ADDED, kind, obj))
+                elif new_hashes[key] != old_hashes[key]:
+                    events.append(Event(UPDATED, kind, obj, old[key]))
+            for key, obj in old.items():
+                if key not in new:
+                    events.append(Event(REMOVED, kind, obj))
+        return events
+
+
+class Watcher(object):
+    """Poll Faythe and mirror its objects in memory.
+
+    :param client: A :class:`faytheclient.client.Client`.
+    :param interval: The number of seconds between two polls.
+    :param jitter: The fraction of the interval added or removed at
+                   random, so many watchers don't poll at the same time.
+    :param kinds: (optional) The kinds of objects to mirror, the clouds
+                  are always listed.
+    :param max_workers: (optional) The maximum number of concurrent
+                        requests, defaults to the client max_workers.
+    :param max_rate: (optional) The maximum number of requests per
+                     second sent by a poll.
+    """
+
+    def __init__(self, client, interval=30, jitter=0.1, kinds=KINDS,
+                 max_workers=None, max_rate=None):
+        self.client = client
+        self.interval = float(interval)
+        self.jitter = float(jitter)
+        self.kinds = tuple(k for k in KINDS if k in kinds or k == 'clouds')
+        self.max_workers = max_workers or client.max_workers
+        self.max_rate = max_rate
+        self.snapshot = Snapshot()
+        self.polls = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Call a callback with the list of events of every poll.
+
+        The callbacks run in the polling thread and are not called
+        when nothing changed. Their exceptions are logged and ignored.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def _throttle(self):
+        if not self.max_rate:
+            return
+        with self._rate_lock:
+            now = time.time()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + \
+                1.0 / self.max_rate
+        if wait > 0:
+            time.sleep(wait)
+
+    def _list(self, target):
+        kind, cloud_id = target
+        self._throttle()
+        if kind == 'clouds':
+            return reconcile.listing_items(self.client.list_clouds())
+        return reconcile.listing_items(
+            getattr(self.client, 'list_' + kind)(cloud_id))
+
+    def _fetch(self, previous):
+        clouds = self._list(('clouds', None))
+        objects = {kind: {} for kind in KINDS}
+        objects['clouds'] = {cloud['id']: cloud for cloud in clouds}
+        targets = []
+        for kind in self.kinds[1:]:
+            if kind == 'healers':
+                # The healers listing isn't filtered by cloud, it is
+                # fetched once.
+                targets.extend(('healers', cloud['id'])
+                               for cloud in clouds[:1])
+            else:
+                targets.extend((kind, cloud['id']) for cloud in clouds)
+
+        for result in batch.fan_out(self._list, targets,
+                                    max_workers=self.max_workers):
+            kind, cloud_id = result.item
+            if result.ok:
+                items = result.value
+            else:
+                # Keep the known objects instead of reporting them as
+                # removed because of a transient error.
+                LOG.warning("Unable to list the %s of cloud %s: %s" %
+                            (kind, cloud_id, result.exception))
+                if kind == 'healers':
+                    items = previous.all(kind)
+                else:
+                    items = previous.by_cloud(kind, cloud_id)
+            for obj in items:
+                if kind != 'healers' and 'cloudid' not in obj:
+                    obj = dict(obj, cloudid=cloud_id)
+                objects[kind][object_key(kind, obj)] = obj
+        return Snapshot(objects)
+
+    def refresh(self):
+        """Poll Faythe once and notify the subscribers of the changes.
+
+        The first poll reports every object as added.
+
+        :returns: The list of events.
+        """
+        with self._lock:
+            previous = self.snapshot
+            snapshot = self._fetch(previous)
+            events = previous.diff(snapshot)
+            self.snapshot = snapshot
+            self.polls += 1
+        if events:
+            for callback in list(self._subscribers):
+                try:
+                    callback(events)
+                except Exception as e:
+                    LOG.exception("Watch subscriber failed: {}".format(e))
+        return events
+
+    def _next_delay(self):
+        spread = self.interval * self.jitter
+        return max(self.interval + random.uniform(-spread, spread), 0)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                LOG.warning("Unable to refresh the Faythe mirror: "
+                            "{}".format(e))
+            self._stopped.wait(self._next_delay())
+
+    def start(self):
+        """Poll from a daemon thread until :meth:`stop` is called."""
+        if self._thread is not None:
+            return self
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='faythe-watcher')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            if self._thread is not threading.current_thread():
+                self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
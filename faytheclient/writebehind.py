@@ -0,0 +1,350 @@
+# Copyright (c) 2020 kiennt2609@gmail.com.
+# All Rights Reserved.
+
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Send the mutations in the background, coalescing the superseded ones.
+
+A controller updating the same scaler many times per second only needs
+the last update to reach Faythe::
+
+    client = Client(endpoint, username, password, write_behind=True)
+    future = client.write_behind.update_scaler(scaler_path, body)
+    ...
+    client.write_behind.flush()
+
+The mutations are keyed by the resource they modify, e.g.
+'/scalers/<cloud id>/<scaler id>'. The mutations of a key are sent in
+order, one at a time, at most max_delay seconds after the first one was
+queued. Until it is sent, a mutation is coalesced with the next ones of
+its key:
+
+- update then update: the last update is sent.
+- update then delete: the delete is sent.
+- create then delete: nothing is sent.
+
+The future of a coalesced mutation gets the result, or the exception,
+of the request which applied it, or None if none was needed. Nothing
+is written until a mutation is sent: call :meth:`WriteBehind.flush` or
+close the client before exiting.
+"""
+
+import collections
+import concurrent.futures
+import logging
+import threading
+import time
+
+from faytheclient import utils
+
+LOG = logging.getLogger(__name__)
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+# Mutations sent as is, e.g. adding policies.
+OTHER = 'other'
+
+
+class Mutation(object):
+    """A queued request and the futures of the calls it applies."""
+
+    __slots__ = ('key', 'op', 'func', 'args', 'futures', 'queued_at')
+
+    def __init__(self, key, op, func, args, future, queued_at):
+        self.key = key
+        self.op = op
+        self.func = func
+        self.args = args
+        self.futures = [future]
+        self.queued_at = queued_at
+
+    def __repr__(self):
+        return '<Mutation %s %s>' % (self.op, self.key)
+
+
+class WriteBehindQueue(object):
+    """Send mutations from a pool of threads, coalescing them by key.
+
+    :param max_delay: The maximum number of seconds a mutation is kept
+                      before being sent, the longer the more updates
+                      are coalesced.
+    :param max_workers: The maximum number of concurrent requests.
+    """
+
+    def __init__(self, max_delay=0.1, max_workers=10):
+        self.max_delay = float(max_delay)
+        self.max_workers = int(max_workers)
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+        # key: the mutations not sent yet, in order.
+        self._pending = collections.OrderedDict()
+        self._inflight = set()
+        self._flushing = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self._executor = None
+
+    def __len__(self):
+        with self._cond:
+            return sum(len(m) for m in self._pending.values()) + \
+                len(self._inflight)
+
+    def submit(self, key, op, func, *args):
+        """Queue a call of func(*args) modifying the resource key.
+
+        :param op: CREATE, UPDATE, DELETE or OTHER, how the call is
+                   coalesced with the queued ones of the same key.
+        :returns: A concurrent.futures.Future of the call result.
+        """
+        future = concurrent.futures.Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("The write-behind queue is closed")
+            self.submitted += 1
+            mutations = self._pending.get(key)
+            if mutations is None:
+                mutations = self._pending[key] = []
+            self._coalesce(mutations, Mutation(key, op, func, args, future,
+                                               time.monotonic()))
+            if not mutations:
+                del self._pending[key]
+            self._start()
+            self._cond.notify_all()
+        return future
+
+    def _coalesce(self, mutations, mutation):
+        # Called with the lock held.
+        last = mutations[-1] if mutations else None
+        if last is None or OTHER in (last.op, mutation.op):
+            mutations.append(mutation)
+        elif mutation.op == UPDATE and last.op == UPDATE or \
+                mutation.op == DELETE and last.op in (UPDATE, DELETE):
+            # Last write wins, sent when the first one would have been.
+            self.coalesced += 1
+            last.op = mutation.op
+            last.func = mutation.func
+            last.args = mutation.args
+            last.futures.extend(mutation.futures)
+            if mutation.op == DELETE and len(mutations) > 1 and \
+                    mutations[-2].op == CREATE:
+                # The object was updated then deleted before being
+                # created.
+                mutations.pop()
+                self._coalesce(mutations, last)
+        elif mutation.op == DELETE and last.op == CREATE:
+            self.coalesced += 2
+            mutations.pop()
+            for future in last.futures + mutation.futures:
+                future.set_result(None)
+        else:
+            mutations.append(mutation)
+
+    def _start(self):
+        # Called with the lock held.
+        if self._thread is not None:
+            return
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers)
+        self._thread = threading.Thread(target=self._run,
+                                        name='faythe-write-behind')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        with self._cond:
+            while True:
+                timeout = self._dispatch()
+                if self._closed and not self._pending and \
+                        not self._inflight:
+                    return
+                self._cond.wait(timeout)
+
+    def _dispatch(self):
+        """Send the due mutations, return the seconds until the next one
+        is due, or None.
+        """
+        now = time.monotonic()
+        timeout = None
+        for key in list(self._pending):
+            if len(self._inflight) >= self.max_workers:
+                break
+            if key in self._inflight:
+                continue
+            mutations = self._pending[key]
+            due = mutations[0].queued_at + self.max_delay - now
+            if due > 0 and not self._flushing and not self._closed:
+                timeout = due if timeout is None else min(timeout, due)
+                continue
+            mutation = mutations.pop(0)
+            if not mutations:
+                del self._pending[key]
+            self._inflight.add(key)
+            self._executor.submit(self._send, mutation)
+        return timeout
+
+    def _send(self, mutation):
+        try:
+            value = mutation.func(*mutation.args)
+        except Exception as e:
+            LOG.debug("Write-behind %r failed: %s" % (mutation, e))
+            for future in mutation.futures:
+                future.set_exception(e)
+            failed = 1
+        else:
+            for future in mutation.futures:
+                future.set_result(value)
+            failed = 0
+        with self._cond:
+            self.sent += 1
+            self.failed += failed
+            self._inflight.discard(mutation.key)
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Send the queued mutations now and wait for them.
+
+        :returns: True if the queue is empty, False on timeout.
+        """
+        expires_at = None if timeout is None else \
+            time.monotonic() + timeout
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                while self._pending or self._inflight:
+                    remaining = None if expires_at is None else \
+                        expires_at - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout=None):
+        """Send the queued mutations and stop the threads.
+
+        :returns: True if every mutation was sent, False on timeout.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        flushed = self.flush(timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=flushed)
+        return flushed
+
+    def stats(self):
+        with self._cond:
+            return {'submitted': self.submitted, 'sent': self.sent,
+                    'coalesced': self.coalesced, 'failed': self.failed,
+                    'pending': sum(len(m) for m in self._pending.values()),
+                    'inflight': len(self._inflight)}
+
+
+class WriteBehind(object):
+    """The mutation methods of a :class:`faytheclient.client.Client`,
+    queued in a :class:`WriteBehindQueue`.
+
+    Every method takes the arguments of the client method of the same
+    name and returns a concurrent.futures.Future of its result.
+    """
+
+    def __init__(self, client, queue):
+        self.client = client
+        self.queue = queue
+
+    def _submit(self, key, op, method, *args):
+        return self.queue.submit(key, op, getattr(self.client, method),
+                                 *args)
+
+    def register_cloud(self, provider, body):
+        # The server picks the id, the clouds are created in order.
+        return self._submit(utils.generate_url('/clouds', provider), OTHER,
+                            'register_cloud', provider, body)
+
+    def update_cloud(self, id, body=None):
+        return self._submit(utils.generate_url('/clouds', id), UPDATE,
+                            'update_cloud', id, body)
+
+    def unregister_cloud(self, id):
+        return self._submit(utils.generate_url('/clouds', id), DELETE,
+                            'unregister_cloud', id)
+
+    def create_scaler(self, cloud_id, body):
+        return self._submit(utils.generate_url('/scalers', cloud_id), OTHER,
+                            'create_scaler', cloud_id, body)
+
+    def update_scaler(self, cloud_id, body=None):
+        return self._submit(utils.generate_url('/scalers', cloud_id),
+                            UPDATE, 'update_scaler', cloud_id, body)
+
+    def delete_scaler(self, cloud_id):
+        return self._submit(utils.generate_url('/scalers', cloud_id),
+                            DELETE, 'delete_scaler', cloud_id)
+
+    def create_healer(self, cloud_id, body):
+        return self._submit(utils.generate_url('/healers', cloud_id), OTHER,
+                            'create_healer', cloud_id, body)
+
+    def delete_healers(self, cloud_id):
+        return self._submit(utils.generate_url('/healers', cloud_id),
+                            DELETE, 'delete_healers', cloud_id)
+
+    def create_silence(self, cloud_id, body):
+        return self._submit(utils.generate_url('/silences', cloud_id),
+                            OTHER, 'create_silence', cloud_id, body)
+
+    def delete_silence(self, cloud_id):
+        return self._submit(utils.generate_url('/silences', cloud_id),
+                            DELETE, 'delete_silence', cloud_id)
+
+    def create_user(self, user):
+        return self._submit(utils.generate_url('/users', user['username']),
+                            CREATE, 'create_user', user)
+
+    def delete_user(self, username):
+        return self._submit(utils.generate_url('/users', username), DELETE,
+                            'delete_user', username)
+
+    def change_password(self, username, newpassword):
+        return self._submit(utils.generate_url('/users', username), UPDATE,
+                            'change_password', username, newpassword)
+
+    def add_policies(self, username, body):
+        return self._submit(utils.generate_url('/policies', username),
+                            OTHER, 'add_policies', username, body)
+
+    def remove_policies(self, username, body):
+        return self._submit(utils.generate_url('/policies', username),
+                            OTHER, 'remove_policies', username, body)
+
+    def flush(self, timeout=None):
+        """See :meth:`WriteBehindQueue.flush`."""
+        return self.queue.flush(timeout)
+
+    def close(self, timeout=None):
+        """See :meth:`WriteBehindQueue.close`."""
+        return self.queue.close(timeout)
+
+    def stats(self):
+        return self.queue.stats()